@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.db import transaction
 
+from .caching import bump_generation
 from .models import Category, Location, Post, Comment
+from .surrogate import post_keys, purge_batcher
 
 
 @admin.register(Category)
@@ -44,15 +47,35 @@ class PostAdmin(admin.ModelAdmin):
         'author',
         'category',
         'location',
+        'image_status',
     )
     list_filter = (
         'author',
         'category',
-        'location'
+        'location',
+        'image_status',
+    )
+    readonly_fields = (
+        'image_status',
+        'image_error',
     )
     search_fields = (
         'title',
     )
+    actions = ('unpublish',)
+
+    @admin.action(description='Снять с публикации')
+    def unpublish(self, request, queryset):
+        # update() не отправляет сигналы моделей, поэтому ключи для сброса
+        # собираются вручную — по одному сбросу на ключ.
+        posts = queryset.select_related('author', 'category')
+        with transaction.atomic():
+            keys = {'index'}
+            for post in posts:
+                keys |= post_keys(post)
+            queryset.update(is_published=False)
+            purge_batcher.add(keys)
+        bump_generation()
 
 
 @admin.register(Comment)
@@ -0,0 +1,186 @@
+"""Выгрузка публичных страниц в статические файлы.
+
+Страница /category/travel/?page=2 записывается в
+category/travel/index.page-2.html, первая страница — в index.html
+(для nginx: ``try_files $uri/index.page-$arg_page.html $uri/index.html``).
+Рядом кладутся сжатые копии .br и .gz для gzip_static/brotli_static.
+
+Каждой странице сопоставляется версия — хеш данных, которые на ней
+выводятся, и версии сайта: времени изменения шаблонов и настроек
+отрисовки. Версии считаются несколькими запросами без отрисовки, поэтому
+повторная выгрузка перерисовывает только страницы, версия которых
+изменилась. Список страниц с версиями хранится в manifest.json.
+"""
+import hashlib
+import json
+import os
+import posixpath
+import tempfile
+from collections import defaultdict
+from itertools import groupby
+from math import ceil
+from pathlib import Path
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from .caching import render_internal
+from .compression import precompress
+from .models import Category, Comment
+from .query_utils import get_optimized_post_queryset
+from .template_warmup import project_template_dirs
+
+MANIFEST = 'manifest.json'
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+# Поля публикации, которые выводятся в карточке и на её странице.
+POST_FIELDS = (
+    'id', 'title', 'text', 'pub_date', 'is_published', 'image',
+    'image_variants', 'image_status', 'image_metadata__width',
+    'image_metadata__height', 'author__username', 'category__slug',
+    'category__title', 'category__is_published', 'location__name',
+    'location__is_published', 'comment_count',
+)
+# Настройки, от которых зависит разметка любой страницы.
+RENDER_SETTINGS = (
+    'MAX_POSTS', 'BLOG_TEMPLATE_ENGINE', 'STATIC_URL', 'MEDIA_URL',
+    'CSS_FILE', 'CSS_INLINE', 'PAGINATION_ON_EACH_SIDE',
+    'PAGINATION_ON_ENDS', 'LANGUAGE_CODE', 'TIME_ZONE',
+)
+
+
+def digest(*parts):
+    return hashlib.md5(
+        json.dumps(parts, default=str, ensure_ascii=False).encode()
+    ).hexdigest()
+
+
+def site_version():
+    """Меняется при правке любого шаблона или настройки отрисовки."""
+    stamps = []
+    directories = project_template_dirs() + [
+        str(directory) for engine in settings.TEMPLATES
+        if engine['BACKEND'].endswith('Jinja2')
+        for directory in engine['DIRS']]
+    for directory in directories:
+        for root, _, names in os.walk(directory):
+            for name in names:
+                stat = os.stat(os.path.join(root, name))
+                stamps.append((root, name, stat.st_mtime_ns, stat.st_size))
+    return digest(
+        sorted(stamps),
+        [getattr(settings, name, None) for name in RENDER_SETTINGS])
+
+
+def list_pages(url, version, cards):
+    # Страница ленты зависит от своих карточек и от числа страниц, по
+    # которому рисуется пагинатор.
+    last = max(ceil(len(cards) / settings.MAX_POSTS), 1)
+    for number in range(1, last + 1):
+        page = cards[(number - 1) * settings.MAX_POSTS:][:settings.MAX_POSTS]
+        page_url = url if number == 1 else f'{url}?page={number}'
+        yield page_url, digest(version, number, last, page)
+
+
+def collect_pages():
+    """{адрес: версия} для всех страниц, видимых анонимному читателю."""
+    site = site_version()
+    posts = list(get_optimized_post_queryset().values_list(*POST_FIELDS))
+    comments = {
+        post_id: digest(list(rows)) for post_id, rows in groupby(
+            Comment.objects.order_by('post_id', 'id').values_list(
+                'post_id', 'id', 'text', 'created_at', 'author__username'),
+            key=lambda row: row[0])
+    }
+    cards = [(post[0], digest(post)) for post in posts]
+    by_category, by_author = defaultdict(list), defaultdict(list)
+    for post, card in zip(posts, cards):
+        by_category[post[POST_FIELDS.index('category__slug')]].append(card)
+        by_author[post[POST_FIELDS.index('author__username')]].append(card)
+
+    pages = dict(list_pages(reverse('blog:index'), site, cards))
+    for post_id, card in cards:
+        pages[reverse('blog:post_detail', args=[post_id])] = digest(
+            site, card, comments.get(post_id))
+    categories = Category.objects.filter(is_published=True).values_list(
+        'slug', 'title', 'description')
+    for category in categories:
+        pages.update(list_pages(
+            reverse('blog:category_posts', args=[category[0]]),
+            digest(site, category), by_category[category[0]]))
+    authors = get_user_model().objects.filter(is_active=True).values_list(
+        'username', 'first_name', 'last_name', 'date_joined')
+    for author in authors:
+        pages.update(list_pages(
+            reverse('blog:profile', args=[author[0]]),
+            digest(site, author), by_author[author[0]]))
+    return pages
+
+
+def page_file(url):
+    """Путь файла страницы относительно каталога выгрузки или None.
+
+    None — для адресов, которые нельзя безопасно разложить по каталогам
+    (например, профиль пользователя с именем '..').
+    """
+    path, _, query = url.partition('?')
+    parts = unquote(path).strip('/').split('/') if path != '/' else []
+    if any(part in ('', '.', '..') for part in parts):
+        return None
+    name = f'index.page-{query[5:]}.html' if query else 'index.html'
+    return posixpath.join(*parts, name)
+
+
+def write_atomic(path, content):
+    # Читатель видит либо старый файл, либо новый целиком.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(
+        dir=path.parent, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(content)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def remove_page(root, name):
+    for suffix in ('', *SUFFIXES.values()):
+        (Path(root) / f'{name}{suffix}').unlink(missing_ok=True)
+
+
+def bake_page(url, root):
+    """Отрисовывает страницу и записывает её; (адрес, размер или ошибка)."""
+    path, _, query = url.partition('?')
+    try:
+        response = render_internal(path, query)
+    except Exception as error:
+        return url, f'{type(error).__name__}: {error}'
+    if response.status_code != 200:
+        return url, f'ответ {response.status_code}'
+    root, name = Path(root), page_file(url)
+    write_atomic(root / name, response.content)
+    encoded = precompress(response.content)
+    for encoding, suffix in SUFFIXES.items():
+        if encoding in encoded:
+            write_atomic(root / f'{name}{suffix}', encoded[encoding])
+        else:
+            (root / f'{name}{suffix}').unlink(missing_ok=True)
+    return url, len(response.content)
+
+
+def read_manifest(root):
+    try:
+        with open(Path(root) / MANIFEST, encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {'pages': {}}
+
+
+def write_manifest(root, manifest):
+    write_atomic(Path(root) / MANIFEST, json.dumps(
+        manifest, ensure_ascii=False, indent=1, sort_keys=True).encode())
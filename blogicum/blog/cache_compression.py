@@ -0,0 +1,192 @@
+import logging
+import pickle
+import threading
+import time
+import zlib
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+try:
+    import lz4.frame
+except ImportError:  # lz4 — необязательная зависимость
+    lz4 = None
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class CompressedValue:
+    """Сериализованное значение; codec None — без сжатия."""
+
+    __slots__ = ('codec', 'data')
+
+    def __init__(self, codec, data):
+        self.codec = codec
+        self.data = data
+
+    def __reduce__(self):
+        return CompressedValue, (self.codec, self.data)
+
+
+def get_codec(name):
+    if name == 'lz4' and lz4 is None:
+        name = 'zlib'
+    if name == 'lz4':
+        return name, lz4.frame.compress, lz4.frame.decompress
+    level = settings.FEED_CACHE_COMPRESSION_LEVEL
+    return 'zlib', (lambda data: zlib.compress(data, level)), zlib.decompress
+
+
+def key_family(key):
+    # blog:<семейство>:<поколение>:<хеш> -> <семейство>
+    parts = key.split(':')
+    return ':'.join(parts[1:-2]) if len(parts) > 3 else parts[0]
+
+
+class CompressionStats:
+    """Сжатие по семействам ключей с начала работы процесса.
+
+    Раз в FEED_CACHE_COMPRESSION_LOG_INTERVAL секунд сводка пишется в
+    журнал blog.cache_compression.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families = defaultdict(lambda: defaultdict(float))
+        self._logged_at = time.monotonic()
+
+    def record(self, family, **values):
+        interval = settings.FEED_CACHE_COMPRESSION_LOG_INTERVAL
+        with self._lock:
+            stats = self._families[family]
+            for name, value in values.items():
+                stats[name] += value
+            now = time.monotonic()
+            due = interval and now - self._logged_at >= interval
+            if due:
+                self._logged_at = now
+        if due:
+            self.log()
+
+    def log(self):
+        for family, stats in sorted(self.report().items()):
+            logger.info(
+                '%s: сжато %d (степень %.1f, %.0f мкс), распаковано %d '
+                '(%.0f мкс)', family, stats.get('compressed', 0),
+                stats['ratio'], average(stats, 'compress_seconds',
+                                        'compressed') * 1e6,
+                stats.get('decompressed', 0),
+                average(stats, 'decompress_seconds', 'decompressed') * 1e6)
+
+    def report(self):
+        with self._lock:
+            families = {
+                family: dict(stats)
+                for family, stats in self._families.items()
+            }
+        for stats in families.values():
+            stored = stats.get('stored_bytes', 0)
+            stats['ratio'] = (
+                stats.get('raw_bytes', 0) / stored if stored else 1.0)
+        return families
+
+    def reset(self):
+        with self._lock:
+            self._families.clear()
+
+
+def average(stats, total, count):
+    return stats.get(total, 0) / stats[count] if stats.get(count) else 0
+
+
+compression_stats = CompressionStats()
+
+
+class CompressingCache:
+    """Обёртка над бэкендом кеша, сжимающая крупные значения.
+
+    Значение сериализуется один раз, и бэкенду передаются готовые байты:
+    сжатые, если их не меньше FEED_CACHE_COMPRESSION_THRESHOLD, иначе как
+    есть. Целые числа хранятся без обёртки, поэтому счётчики вроде
+    поколения лент остаются пригодными для ``incr``.
+    """
+
+    def __init__(self, backend, codec='zlib'):
+        self.backend = backend
+        self.codec, self._compress, self._decompress = get_codec(codec)
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def encode(self, key, value):
+        if isinstance(value, int):
+            return value
+        raw = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(raw) < settings.FEED_CACHE_COMPRESSION_THRESHOLD:
+            return CompressedValue(None, raw)
+        started = time.perf_counter()
+        data = self._compress(raw)
+        compression_stats.record(
+            key_family(key),
+            compressed=1,
+            raw_bytes=len(raw),
+            stored_bytes=len(data),
+            compress_seconds=time.perf_counter() - started,
+        )
+        return CompressedValue(self.codec, data)
+
+    def decode(self, key, value):
+        if not isinstance(value, CompressedValue):
+            return value
+        if value.codec is None:
+            return pickle.loads(value.data)
+        started = time.perf_counter()
+        if value.codec == self.codec:
+            raw = self._decompress(value.data)
+        else:
+            raw = get_codec(value.codec)[2](value.data)
+        compression_stats.record(
+            key_family(key),
+            decompressed=1,
+            decompress_seconds=time.perf_counter() - started,
+        )
+        return pickle.loads(raw)
+
+    def get(self, key, default=None, version=None):
+        value = self.backend.get(key, default, version=version)
+        return self.decode(key, value)
+
+    def get_many(self, keys, version=None):
+        return {
+            key: self.decode(key, value) for key, value in
+            self.backend.get_many(keys, version=version).items()
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.backend.set(
+            key, self.encode(key, value), timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.backend.set_many(
+            {key: self.encode(key, value) for key, value in data.items()},
+            timeout, version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.backend.add(
+            key, self.encode(key, value), timeout, version=version)
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT,
+                   version=None):
+        # Как BaseCache.get_or_set, но через сжимающие get() и add().
+        value = self.get(key, MISSING, version=version)
+        if value is not MISSING:
+            return value
+        if callable(default):
+            default = default()
+        self.add(key, default, timeout, version=version)
+        # Повторное чтение — на случай, если значение успел записать
+        # другой процесс.
+        return self.get(key, default, version=version)
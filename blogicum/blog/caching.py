@@ -0,0 +1,315 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.db import connections
+from django.http import Http404, HttpRequest, HttpResponse, QueryDict
+from django.urls import resolve
+
+from .cache_compression import CompressingCache
+from .compression import precompress as precompress_content
+from .holes import fill_holes, make_skeleton_request
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'blog:feed-generation'
+
+HIT = 'hit'
+STALE = 'stale'
+MISS = 'miss'
+
+
+def get_cache():
+    cache = caches[settings.FEED_CACHE_ALIAS]
+    if settings.FEED_CACHE_COMPRESSION:
+        return CompressingCache(cache, settings.FEED_CACHE_COMPRESSION)
+    return cache
+
+
+def get_generation():
+    cache = get_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def bump_generation():
+    # Любое изменение контента делает недействительными все записи лент:
+    # номер поколения входит в ключ, старые записи просто истекают сами.
+    cache = get_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def make_key(prefix, *parts):
+    digest = hashlib.md5(
+        '|'.join(str(part) for part in parts).encode()
+    ).hexdigest()
+    return f'blog:{prefix}:{get_generation()}:{digest}'
+
+
+def make_internal_request(path, query_string=''):
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = path
+    request.META = {
+        'REQUEST_METHOD': 'GET',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'QUERY_STRING': query_string,
+    }
+    request.GET = QueryDict(query_string)
+    request.user = AnonymousUser()
+    return request
+
+
+def render_internal(path, query_string=''):
+    # Отрисовка страницы от имени анонимного читателя в обход middleware:
+    # ответ проходит через кеширующие миксины представлений.
+    request = make_internal_request(path, query_string)
+    match = resolve(path)
+    response = match.func(request, *match.args, **match.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
+
+class StaleWhileRevalidateCache:
+    """Кеш, отдающий просроченные записи, пока они обновляются в фоне.
+
+    Запись живёт в бэкенде ``timeout + grace`` секунд. Первые ``timeout``
+    секунд она свежая, затем в течение ``grace`` секунд отдаётся как
+    устаревшая, а её перерисовка ставится в ограниченную очередь пула
+    потоков.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._refreshing = set()
+        self._stats = Counter()
+
+    @property
+    def cache(self):
+        return get_cache()
+
+    def lookup(self, key):
+        entry = self.cache.get(key)
+        if entry is None:
+            self._count(MISS)
+            return None, MISS
+        expires_at, value = entry
+        age = time.time() - expires_at
+        if age <= 0:
+            self._count(HIT)
+            return value, HIT
+        with self._lock:
+            self._stats[STALE] += 1
+            self._stats['stale_seconds'] += age
+            self._stats['max_stale_seconds'] = max(
+                self._stats['max_stale_seconds'], age)
+        return value, STALE
+
+    def set(self, key, value, timeout=None):
+        if timeout is None:
+            timeout = settings.FEED_CACHE_TIMEOUT
+        self.cache.set(
+            key,
+            (time.time() + timeout, value),
+            timeout + settings.FEED_CACHE_STALE_GRACE,
+        )
+
+    def revalidate(self, key, producer, timeout=None):
+        with self._lock:
+            if key in self._refreshing:
+                self._stats['refresh_coalesced'] += 1
+                return False
+            if len(self._refreshing) >= settings.FEED_CACHE_REFRESH_QUEUE_SIZE:
+                self._stats['refresh_dropped'] += 1
+                return False
+            self._refreshing.add(key)
+            self._stats['refresh_scheduled'] += 1
+            executor = self._get_executor()
+        executor.submit(self._refresh, key, producer, timeout)
+        return True
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['refresh_pending'] = len(self._refreshing)
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.FEED_CACHE_REFRESH_WORKERS,
+                thread_name_prefix='feed-cache-refresh',
+            )
+        return self._executor
+
+    def _refresh(self, key, producer, timeout):
+        try:
+            value = producer()
+            if value is not None:
+                self.set(key, value, timeout)
+                self._count('refresh_done')
+        except Exception:
+            self._count('refresh_failed')
+            logger.exception('Не удалось обновить запись кеша %s', key)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+            # У фонового потока свои подключения к БД — закрываем их сами.
+            connections.close_all()
+
+
+feed_cache = StaleWhileRevalidateCache()
+
+
+class CachedPageMixin:
+    """Кеширует отрисованные страницы лент.
+
+    В обычном режиме кешируются готовые страницы для анонимных читателей.
+    В режиме FEED_CACHE_HOLE_PUNCHING кешируется общий для всех каркас,
+    а персональные части (``{% hole %}``) дорисовываются при каждом ответе.
+    """
+
+    cached_headers = ('Content-Type', 'Surrogate-Key')
+
+    def page_cache_applies(self, request):
+        return (
+            settings.FEED_CACHE_ENABLED
+            and request.method in ('GET', 'HEAD')
+            and not request.user.is_authenticated
+        )
+
+    def hole_punching_applies(self, request):
+        # Метки {% hole %} есть только в шаблонах Django.
+        return (
+            settings.FEED_CACHE_ENABLED
+            and settings.FEED_CACHE_HOLE_PUNCHING
+            and settings.BLOG_TEMPLATE_ENGINE == 'django'
+            and request.method in ('GET', 'HEAD')
+        )
+
+    def get_page_cache_key(self, request, prefix='page'):
+        return make_key(prefix, request.get_full_path())
+
+    def get_hole_context(self):
+        return {}
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.hole_punching_applies(request):
+            return self.dispatch_hole_punched(request, *args, **kwargs)
+        if not self.page_cache_applies(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = self.get_page_cache_key(request)
+        entry, state = feed_cache.lookup(key)
+        if state == MISS:
+            response = super().dispatch(request, *args, **kwargs)
+            entry = self.serialize_page(response)
+            if entry is not None:
+                feed_cache.set(key, entry)
+                response.precompressed = entry.get('encoded')
+            response['X-Cache'] = MISS.upper()
+            return response
+
+        if state == STALE:
+            feed_cache.revalidate(
+                key, self.page_producer(request, *args, **kwargs))
+        return self.build_cached_response(entry, state)
+
+    def dispatch_hole_punched(self, request, *args, **kwargs):
+        key = self.get_page_cache_key(request, prefix='skeleton')
+        skeleton_request = make_skeleton_request(request)
+        entry, state = feed_cache.lookup(key)
+        if state == MISS:
+            try:
+                entry = self.serialize_page(
+                    self.render_page(skeleton_request, *args, **kwargs),
+                    precompress=False)
+            except Http404:
+                # Автор может видеть свои скрытые публикации, которых
+                # нет в общем каркасе.
+                if not request.user.is_authenticated:
+                    raise
+                entry = None
+            if entry is None:
+                return super().dispatch(request, *args, **kwargs)
+            feed_cache.set(key, entry)
+        elif state == STALE:
+            feed_cache.revalidate(
+                key, self.page_producer(skeleton_request, *args, **kwargs))
+
+        return self.build_cached_response(
+            dict(entry, encoded=None, content=fill_holes(
+                entry['content'], request, self.get_hole_context())),
+            state,
+        )
+
+    def render_page(self, request, *args, **kwargs):
+        view = type(self)()
+        view.setup(request, *args, **kwargs)
+        return super(CachedPageMixin, view).dispatch(
+            request, *args, **kwargs)
+
+    def page_producer(self, request, *args, **kwargs):
+        # Перерисовка идёт в пуле потоков, пока ответ на этот запрос ещё
+        # проходит middleware, поэтому у неё свой запрос от имени
+        # анонимного читателя: общие с request объекты передавать нельзя.
+        refresh_request = make_internal_request(
+            request.path, request.META.get('QUERY_STRING', ''))
+        refresh_request.META['HTTP_HOST'] = request.get_host()
+        # Каркас со всеми дырами сжимать заранее бесполезно: тело ответа
+        # меняется при заполнении.
+        precompress = not getattr(request, 'hole_punching', False)
+        if not precompress:
+            refresh_request = make_skeleton_request(refresh_request)
+        return lambda: self.serialize_page(
+            self.render_page(refresh_request, *args, **kwargs), precompress)
+
+    def serialize_page(self, response, precompress=True):
+        if response.status_code != 200 or response.streaming:
+            return None
+        if hasattr(response, 'render'):
+            response.render()
+        return {
+            'content': response.content,
+            'headers': {
+                header: response[header]
+                for header in self.cached_headers
+                if response.has_header(header)
+            },
+            # Сжатые копии тела для CompressionMiddleware: попадание в кеш
+            # обходится без сжатия.
+            'encoded': (
+                precompress_content(response.content)
+                if precompress and settings.FEED_CACHE_PRECOMPRESS else None),
+        }
+
+    def build_cached_response(self, entry, state):
+        response = HttpResponse(entry['content'])
+        response.precompressed = entry.get('encoded')
+        for header, value in entry['headers'].items():
+            response[header] = value
+        response['X-Cache'] = state.upper()
+        return response
@@ -0,0 +1,150 @@
+import gzip
+import zlib
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # brotli — необязательная зависимость
+    brotli = None
+
+from .media import accepted_encodings
+
+# Страницы из кеша лент сжимаются один раз, поэтому можно не экономить
+# время процессора — как и для статики в storage.compress_static.
+CACHED_LEVELS = {'br': 11, 'gzip': 9}
+
+
+def available_encodings():
+    """Кодировки в порядке предпочтения."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(header):
+    accepted = accepted_encodings(header)
+    for encoding in available_encodings():
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def _level(encoding, level):
+    if level is not None:
+        return level
+    if encoding == 'br':
+        return settings.RESPONSE_COMPRESSION_BROTLI_QUALITY
+    return settings.RESPONSE_COMPRESSION_GZIP_LEVEL
+
+
+def compress(data, encoding, level=None):
+    if encoding == 'br':
+        return brotli.compress(data, quality=_level(encoding, level))
+    return gzip.compress(data, _level(encoding, level), mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    """Сжимает поток, отдавая каждый кусок сразу, а не в конце ответа."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=_level(encoding, None))
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(
+        _level(encoding, None), zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def precompress(content):
+    """Сжатые копии страницы для кеша: {кодировка: тело}.
+
+    Копия, которая не меньше оригинала, не сохраняется.
+    """
+    if len(content) < settings.RESPONSE_COMPRESSION_MIN_SIZE:
+        return {}
+    encoded = {}
+    for encoding in available_encodings():
+        body = compress(content, encoding, CACHED_LEVELS[encoding])
+        if len(body) < len(content):
+            encoded[encoding] = body
+    return encoded
+
+
+def breach_sensitive(view):
+    """Отмечает ответы вьюхи как содержащие секрет в открытом виде.
+
+    Такие ответы не сжимаются, если в запросе есть данные пользователя:
+    по размеру сжатого ответа секрет можно подобрать (атака BREACH).
+    """
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        response = view(*args, **kwargs)
+        response.breach_sensitive = True
+        return response
+    return wrapped
+
+
+def reflects_secret(request, response):
+    # Токен CSRF Django маскирует случайной солью заново для каждого
+    # ответа, но в формах рядом с введёнными данными выводятся и другие
+    # секреты (адрес почты в профиле, имя при ошибке входа). Поэтому
+    # все вьюхи с формами отмечены breach_sensitive.
+    return getattr(response, 'breach_sensitive', False) and bool(
+        request.GET or request.method == 'POST')
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжимает ответы brotli или gzip в зависимости от Accept-Encoding.
+
+    Не сжимаются ответы уже сжатые, неподходящих типов, меньше
+    RESPONSE_COMPRESSION_MIN_SIZE байт и те, что отражают секрет рядом
+    с данными из запроса. Для страниц из кеша лент берутся сохранённые
+    сжатые копии (атрибут precompressed ответа).
+    """
+
+    def process_response(self, request, response):
+        if not self.compressible(request, response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            precompressed = getattr(response, 'precompressed', None) or {}
+            body = precompressed.get(encoding)
+            if body is None:
+                body = compress(response.content, encoding)
+                if len(body) >= len(response.content):
+                    return response
+            response.content = body
+            response['Content-Length'] = str(len(body))
+
+        # Сжатое тело побайтно отличается от исходного.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def compressible(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return False
+        if response.status_code in (204, 206, 304):
+            return False
+        if not response.get('Content-Type', '').startswith(
+                tuple(settings.RESPONSE_COMPRESSION_TYPES)):
+            return False
+        if not response.streaming and len(response.content) < (
+                settings.RESPONSE_COMPRESSION_MIN_SIZE):
+            return False
+        return not reflects_secret(request, response)
@@ -0,0 +1,188 @@
+import re
+
+TOKEN = re.compile(r'[A-Za-z_][\w-]*')
+CLASS = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+# Внутри :not(...) и [атрибутов] классы не обязаны присутствовать
+# на странице.
+IGNORED_PARTS = re.compile(r':not\([^)]*\)|\[[^\]]*\]')
+KEYFRAMES = re.compile(r'@(?:-webkit-)?keyframes\s+([\w-]+)')
+NESTED_AT_RULES = ('@media', '@supports', '@container', '@layer')
+
+
+def extract_tokens(text):
+    """Все слова, похожие на имена классов.
+
+    Разбор намеренно грубый: лишнее слово лишь оставит лишнее правило,
+    а пропущенный класс сломал бы вёрстку.
+    """
+    return set(TOKEN.findall(text))
+
+
+def _skip_string(css, index):
+    quote = css[index]
+    index += 1
+    while index < len(css) and css[index] != quote:
+        index += 2 if css[index] == '\\' else 1
+    return index + 1
+
+
+def _skip_comment(css, index):
+    end = css.find('*/', index + 2)
+    return len(css) if end == -1 else end + 2
+
+
+def _find_prelude_end(css, index):
+    depth = 0
+    while index < len(css):
+        char = css[index]
+        if char in '"\'':
+            index = _skip_string(css, index)
+            continue
+        if css.startswith('/*', index):
+            index = _skip_comment(css, index)
+            continue
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif depth == 0 and char in '{;':
+            return index
+        index += 1
+    return index
+
+
+def _find_block_end(css, index):
+    level = 1
+    while index < len(css) and level:
+        char = css[index]
+        if char in '"\'':
+            index = _skip_string(css, index)
+            continue
+        if css.startswith('/*', index):
+            index = _skip_comment(css, index)
+            continue
+        if char == '{':
+            level += 1
+        elif char == '}':
+            level -= 1
+        index += 1
+    return index
+
+
+def parse(css):
+    """Разбивает CSS на узлы верхнего уровня.
+
+    Узлы: ('comment', текст), ('statement', текст) для @import и т. п.,
+    ('block', заголовок, тело).
+    """
+    nodes = []
+    index = 0
+    while index < len(css):
+        if css[index].isspace():
+            index += 1
+            continue
+        if css.startswith('/*', index):
+            end = _skip_comment(css, index)
+            nodes.append(('comment', css[index:end]))
+            index = end
+            continue
+        end = _find_prelude_end(css, index)
+        prelude = css[index:end].strip()
+        if end >= len(css) or css[end] == ';':
+            nodes.append(('statement', prelude + ';'))
+            index = end + 1
+            continue
+        block_end = _find_block_end(css, end + 1)
+        nodes.append(('block', prelude, css[end + 1:block_end - 1]))
+        index = block_end
+    return nodes
+
+
+def split_selectors(prelude):
+    selectors, depth, start = [], 0, 0
+    for index, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:index].strip())
+            start = index + 1
+    selectors.append(prelude[start:].strip())
+    return selectors
+
+
+def compile_safelist(patterns):
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns))
+
+
+def selector_used(selector, used, safelist=None):
+    classes = CLASS.findall(IGNORED_PARTS.sub('', selector))
+    return all(
+        name in used or (safelist is not None and safelist.fullmatch(name))
+        for name in classes
+    )
+
+
+def _purge_nodes(nodes, used, safelist, stats):
+    parts = []
+    for node in nodes:
+        kind = node[0]
+        if kind == 'comment':
+            # Лицензионные комментарии /*! ... */ сохраняются.
+            if node[1].startswith('/*!'):
+                parts.append(node[1])
+            continue
+        if kind == 'statement':
+            parts.append(node[1])
+            continue
+        _, prelude, body = node
+        if prelude.startswith(NESTED_AT_RULES):
+            inner = _purge_nodes(parse(body), used, safelist, stats)
+            if inner:
+                parts.append(f'{prelude}{{{inner}}}')
+            continue
+        if prelude.startswith('@'):
+            parts.append(f'{prelude}{{{body}}}')
+            continue
+        stats['rules'] += 1
+        kept = [
+            selector for selector in split_selectors(prelude)
+            if selector_used(selector, used, safelist)
+        ]
+        if kept:
+            stats['kept'] += 1
+            parts.append(f'{",".join(kept)}{{{body}}}')
+    return ''.join(parts)
+
+
+def _drop_unused_keyframes(css):
+    nodes = parse(css)
+    rest = ''.join(
+        node[1] if node[0] != 'block' else f'{node[1]}{{{node[2]}}}'
+        for node in nodes
+        if not (node[0] == 'block' and KEYFRAMES.match(node[1]))
+    )
+    parts = []
+    for node in nodes:
+        if node[0] == 'block':
+            match = KEYFRAMES.match(node[1])
+            if match and not re.search(
+                    rf'(?<![\w-]){re.escape(match[1])}(?![\w-])', rest):
+                continue
+            parts.append(f'{node[1]}{{{node[2]}}}')
+        else:
+            parts.append(node[1])
+    return ''.join(parts)
+
+
+def purge(css, used, safelist=None):
+    """Оставляет в CSS только правила, все классы которых используются.
+
+    Возвращает (новый CSS, {'rules': всего правил, 'kept': оставлено}).
+    """
+    stats = {'rules': 0, 'kept': 0}
+    purged = _purge_nodes(parse(css), used, safelist, stats)
+    return _drop_unused_keyframes(purged), stats
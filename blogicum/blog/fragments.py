@@ -0,0 +1,86 @@
+"""Подгрузка лент порциями карточек для бесконечной прокрутки.
+
+Порция выбирается по курсору — дате публикации и id последней показанной
+карточки, — а не по номеру страницы: это один запрос без COUNT(*) и без
+OFFSET, и публикации, добавленные во время чтения, не сдвигают ленту.
+Адрес следующей порции отдаётся в заголовке X-Next-Page.
+"""
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import HttpResponseBadRequest
+from django.urls import reverse
+from django.views.generic import View
+from django.views.generic.base import TemplateResponseMixin
+
+from .mixins import TemplateEngineMixin
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_cursor(post):
+    delta = post.pub_date - EPOCH
+    microseconds = (
+        (delta.days * 86400 + delta.seconds) * 10 ** 6 + delta.microseconds)
+    return f'{microseconds}.{post.pk}'
+
+
+def decode_cursor(cursor):
+    """(дата публикации, id).
+
+    ValueError, если курсор испорчен, OverflowError, если дата вне
+    допустимого диапазона.
+    """
+    microseconds, pk = map(int, cursor.split('.'))
+    # Иначе ошибка случится только при выполнении запроса.
+    if not 0 < pk < 2 ** 63:
+        raise ValueError(f'id вне допустимого диапазона: {pk}')
+    return EPOCH + timedelta(microseconds=microseconds), pk
+
+
+def after_cursor(queryset, cursor):
+    pub_date, pk = decode_cursor(cursor)
+    return queryset.filter(
+        Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk))
+
+
+class FeedFragmentMixin:
+    """Передаёт ленте адрес порции, идущей за текущей страницей."""
+
+    fragment_url_name = None
+
+    def get_fragment_url_args(self):
+        return ()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context.get('page_obj')
+        if page is not None and page.has_next() and len(page):
+            context['more_url'] = '{}?after={}'.format(
+                reverse(self.fragment_url_name,
+                        args=self.get_fragment_url_args()),
+                encode_cursor(page[len(page) - 1]))
+        return context
+
+
+class FeedFragmentView(TemplateEngineMixin, TemplateResponseMixin, View):
+    """Порция карточек ленты после курсора из параметра after."""
+
+    template_name = 'blog/post_fragment.html'
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        if 'after' in request.GET:
+            try:
+                queryset = after_cursor(queryset, request.GET['after'])
+            except (ValueError, OverflowError):
+                return HttpResponseBadRequest()
+        batch = settings.MAX_POSTS
+        # Лишняя запись показывает, есть ли следующая порция.
+        posts = list(queryset[:batch + 1])
+        response = self.render_to_response({'posts': posts[:batch]})
+        if len(posts) > batch:
+            response['X-Next-Page'] = (
+                f'{request.path}?after={encode_cursor(posts[batch - 1])}')
+        return response
@@ -0,0 +1,61 @@
+import base64
+import json
+import re
+from copy import copy
+from functools import lru_cache
+
+from django.contrib.auth.models import AnonymousUser
+from django.template import RequestContext
+from django.template.loader import get_template
+
+MARKER_RE = re.compile(r'<!--blog-hole:([A-Za-z0-9_=-]+)-->')
+
+
+def is_skeleton_render(context):
+    return getattr(context.get('request'), 'hole_punching', False)
+
+
+def make_skeleton_request(request):
+    # Каркас страницы общий для всех, поэтому отрисовывается от имени
+    # анонимного пользователя; персональные части остаются «дырами».
+    skeleton_request = copy(request)
+    skeleton_request.user = AnonymousUser()
+    skeleton_request.hole_punching = True
+    return skeleton_request
+
+
+def make_marker(template_name, name, args):
+    payload = json.dumps(
+        {'t': template_name, 'n': name, 'a': args},
+        separators=(',', ':'), ensure_ascii=False,
+    )
+    token = base64.urlsafe_b64encode(payload.encode()).decode()
+    return f'<!--blog-hole:{token}-->'
+
+
+@lru_cache(maxsize=256)
+def find_hole_node(template, name):
+    from .templatetags.blog_cache import HoleNode
+
+    for node in template.nodelist.get_nodes_by_type(HoleNode):
+        if node.name == name:
+            return node
+    raise LookupError(f'В шаблоне {template.name} нет дыры {name!r}')
+
+
+def render_hole(request, template_name, name, args, extra_context=None):
+    template = get_template(template_name).template
+    node = find_hole_node(template, name)
+    context = RequestContext(request, extra_context or {})
+    with context.bind_template(template):
+        with context.push(args):
+            return node.nodelist.render(context)
+
+
+def fill_holes(content, request, extra_context=None):
+    def fill(match):
+        hole = json.loads(base64.urlsafe_b64decode(match.group(1)))
+        return render_hole(
+            request, hole['t'], hole['n'], hole['a'], extra_context)
+
+    return MARKER_RE.sub(fill, content.decode()).encode()
@@ -0,0 +1,131 @@
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.db import connections, transaction
+from PIL import Image, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Повторная попытка с тем же файлом закончится так же.
+PERMANENT_ERRORS = (
+    UnidentifiedImageError, FileNotFoundError, Image.DecompressionBombError)
+
+
+def process_post_image(post_id):
+    """Создаёт варианты фото публикации, повторяя попытки при ошибках."""
+    from .caching import bump_generation
+    from .images import delete_variants, generate_variants
+    from .models import Post
+    from .surrogate import purge_batcher
+
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    retries = settings.IMAGE_PROCESSING_RETRIES
+    for attempt in range(1, retries + 1):
+        try:
+            variants = generate_variants(post.image)
+            break
+        except Exception as error:
+            # Кроме ошибок чтения файла бывают и сбои Pillow, хранилища
+            # или БД; после последней попытки публикация не должна
+            # остаться в статусе «обрабатывается».
+            if attempt == retries or isinstance(error, PERMANENT_ERRORS):
+                logger.error(
+                    'Не удалось обработать фото публикации %s: %s',
+                    post_id, error,
+                    exc_info=not isinstance(
+                        error, (OSError, *PERMANENT_ERRORS)))
+                Post.objects.filter(
+                    pk=post_id, image=post.image.name
+                ).update(image_status=Post.ImageStatus.FAILED,
+                         image_error=str(error))
+                return
+            time.sleep(
+                settings.IMAGE_PROCESSING_RETRY_DELAY * 2 ** attempt)
+
+    # Пока шла обработка, автор мог заменить фото — тогда результат
+    # уже не нужен.
+    updated = Post.objects.filter(
+        pk=post_id, image=post.image.name
+    ).update(image_variants=variants,
+             image_status=Post.ImageStatus.READY,
+             image_error='')
+    if not updated:
+        delete_variants(post.image.storage, variants)
+        return
+    # update() не отправляет сигналы — кеши сбрасываются вручную.
+    bump_generation()
+    purge_batcher.add({f'post-{post_id}'})
+
+
+def process_in_worker(post_id):
+    # У потока или процесса пула свои подключения к БД — закрываем их
+    # сами. В режиме sync и в команде process_images подключение
+    # принадлежит вызывающему коду, и его транзакцию трогать нельзя.
+    try:
+        process_post_image(post_id)
+    finally:
+        connections.close_all()
+
+
+class ImageProcessor:
+    """Ограниченная очередь обработки фото в пуле потоков или процессов."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = set()
+
+    def schedule(self, post_id, using=None):
+        transaction.on_commit(lambda: self.submit(post_id), using=using)
+
+    def submit(self, post_id):
+        if settings.IMAGE_PROCESSING_EXECUTOR == 'sync':
+            process_post_image(post_id)
+            return True
+        with self._lock:
+            if post_id in self._pending:
+                return True
+            if len(self._pending) >= settings.IMAGE_PROCESSING_QUEUE_SIZE:
+                # Публикация останется в статусе «обрабатывается», её
+                # подберёт команда process_images.
+                logger.warning(
+                    'Очередь обработки фото заполнена, публикация %s '
+                    'отложена', post_id)
+                return False
+            self._pending.add(post_id)
+            executor = self._get_executor()
+        future = executor.submit(process_in_worker, post_id)
+        future.add_done_callback(lambda future: self._done(post_id, future))
+        return True
+
+    def _done(self, post_id, future):
+        with self._lock:
+            self._pending.discard(post_id)
+        if future.exception() is not None:
+            logger.error(
+                'Сбой обработки фото публикации %s', post_id,
+                exc_info=future.exception())
+
+    def _get_executor(self):
+        if self._executor is None:
+            workers = settings.IMAGE_PROCESSING_WORKERS
+            if settings.IMAGE_PROCESSING_EXECUTOR == 'process':
+                self._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=django.setup,
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix='post-images')
+        return self._executor
+
+
+image_processor = ImageProcessor()
@@ -0,0 +1,218 @@
+import posixpath
+import re
+import uuid
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+try:
+    import pillow_avif  # noqa: F401 — регистрирует кодек AVIF в Pillow
+except ImportError:
+    pass
+
+# Максимальные ширина и высота вариантов фото.
+VARIANT_SIZES = {
+    'card': (640, 640),
+    'detail': (1280, 1280),
+}
+# Ширины адаптивных копий для srcset.
+RESPONSIVE_WIDTHS = (320, 640, 960, 1280)
+JPEG_QUALITY = 85
+EXIF_ORIENTATION = 0x0112
+UPLOAD_DIR = 'post_images'
+# post_images/ab/cd/<32 hex>.<ext>: 65 536 каталогов, в каждом в среднем
+# в 65 536 раз меньше файлов, чем в плоском каталоге.
+SHARDED_NAME = re.compile(
+    rf'^{UPLOAD_DIR}/([0-9a-f]{{2}})/([0-9a-f]{{2}})/\1\2[0-9a-f]{{28}}\.')
+MODERN_FORMATS = {
+    # формат: (расширение, MIME-тип, параметры сохранения)
+    'AVIF': ('avif', 'image/avif', {'quality': 60}),
+    'WEBP': ('webp', 'image/webp', {'quality': 80, 'method': 6}),
+}
+
+
+def variant_name(name, variant, extension):
+    # Варианты лежат рядом с оригиналом, а их имена начинаются с имени
+    # оригинала: post_images/photo.jpg -> post_images/photo.jpg.card.jpg
+    return f'{name}.{variant}.{extension}'
+
+
+def shard_name(digest, filename):
+    extension = posixpath.splitext(filename)[1].lower()
+    return posixpath.join(
+        UPLOAD_DIR, digest[:2], digest[2:4], f'{digest[:32]}{extension}')
+
+
+def post_image_upload_to(instance, filename):
+    return shard_name(uuid.uuid4().hex, filename)
+
+
+def is_sharded(name):
+    return bool(SHARDED_NAME.match(name))
+
+
+def modern_formats():
+    Image.init()
+    return [
+        image_format for image_format in MODERN_FORMATS
+        if image_format in Image.SAVE
+    ]
+
+
+def resize(image, size):
+    variant = image.copy()
+    variant.thumbnail(size, Image.Resampling.LANCZOS)
+    return variant
+
+
+def encode(image, image_format):
+    buffer = BytesIO()
+    if image_format == 'JPEG':
+        image.convert('RGB').save(
+            buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True,
+            progressive=True)
+    elif image_format in MODERN_FORMATS:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        image.save(buffer, image_format, **MODERN_FORMATS[image_format][2])
+    else:
+        image.save(buffer, image_format, optimize=True)
+    return buffer.getvalue()
+
+
+def open_image(field_file):
+    with field_file.open('rb') as source:
+        image = Image.open(source)
+        image.load()
+    return ImageOps.exif_transpose(image)
+
+
+def read_metadata(field_file):
+    """Читает размеры и формат фото из заголовка файла, не декодируя его.
+
+    Возвращает None, если фото нет или файл не читается как изображение.
+    """
+    if not field_file:
+        return None
+    try:
+        size = field_file.size
+        with field_file.open('rb') as source, Image.open(source) as image:
+            width, height = image.size
+            # Ориентации 5–8 поворачивают снимок на 90°, как это сделает
+            # exif_transpose() при создании вариантов.
+            if image.getexif().get(EXIF_ORIENTATION, 1) > 4:
+                width, height = height, width
+            return {
+                'width': width,
+                'height': height,
+                'size': size,
+                'format': image.format or '',
+            }
+    except OSError:
+        return None
+
+
+def scaled_size(width, height, box):
+    """Размеры копии, вписанной в box, как у Image.thumbnail()."""
+    if not width or not height:
+        return None, None
+    scale = min(1, box[0] / width, box[1] / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def save_variant(storage, name, content):
+    # Хранилище фото перезаписывает варианты атомарно; в остальных
+    # прежний файл нужно удалить, иначе новый получит другое имя.
+    is_variant = getattr(storage, 'is_variant', None)
+    if not (is_variant and is_variant(name)) and storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(content))
+
+
+def responsive_widths(width):
+    # Копии шире оригинала не нужны, но хотя бы одна копия есть всегда.
+    largest = min(width, RESPONSIVE_WIDTHS[-1])
+    return [w for w in RESPONSIVE_WIDTHS if w < largest] + [largest]
+
+
+def generate_variants(field_file):
+    """Создаёт уменьшенные копии фото и возвращает словарь их имён.
+
+    Если файл не удаётся прочитать как изображение, бросает OSError.
+    """
+    storage = field_file.storage
+    image = open_image(field_file)
+    has_alpha = image.mode in ('RGBA', 'LA', 'P')
+    image_format, extension = ('PNG', 'png') if has_alpha else ('JPEG', 'jpg')
+    variants = {'source': field_file.name, 'srcset': {}}
+    for variant, size in VARIANT_SIZES.items():
+        variants[variant] = save_variant(
+            storage,
+            variant_name(field_file.name, variant, extension),
+            encode(resize(image, size), image_format),
+        )
+
+    for modern_format in modern_formats():
+        modern_extension = MODERN_FORMATS[modern_format][0]
+        sources = variants['srcset'][modern_extension] = []
+        for width in responsive_widths(image.width):
+            resized = resize(image, (width, image.height))
+            sources.append([resized.width, save_variant(
+                storage,
+                variant_name(field_file.name, f'w{width}', modern_extension),
+                encode(resized, modern_format),
+            )])
+    return variants
+
+
+def candidate_names(name):
+    # Имена фото, вариантом которых может быть файл:
+    # post_images/ab.jpg.card.jpg -> ab, ab.jpg, ab.jpg.card, ...
+    directory = name.rpartition('/')[0]
+    return [name] + [
+        name[:index] for index, char in enumerate(name)
+        if char == '.' and index > len(directory)
+    ]
+
+
+def iter_variant_names(variants):
+    for variant, value in variants.items():
+        if variant == 'source':
+            continue
+        if variant == 'srcset':
+            for sources in value.values():
+                for _, name in sources:
+                    yield name
+        else:
+            yield value
+
+
+def delete_variants(storage, variants):
+    for name in iter_variant_names(variants):
+        if storage.exists(name):
+            storage.delete(name)
+
+
+def variants_match(field_file, variants):
+    return bool(field_file) and variants.get('source') == field_file.name
+
+
+def variant_url(field_file, variants, variant):
+    if variants_match(field_file, variants) and variant in variants:
+        return field_file.storage.url(variants[variant])
+    return field_file.url
+
+
+def srcset(field_file, variants):
+    """Возвращает [(MIME-тип, строка srcset), ...] для тегов <source>."""
+    if not variants_match(field_file, variants):
+        return []
+    storage = field_file.storage
+    sources = []
+    for extension, mime_type, _ in MODERN_FORMATS.values():
+        widths = variants.get('srcset', {}).get(extension)
+        if widths:
+            sources.append((mime_type, ', '.join(
+                f'{storage.url(name)} {width}w' for width, name in widths)))
+    return sources
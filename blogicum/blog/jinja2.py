@@ -0,0 +1,94 @@
+"""Окружение Jinja2 для страниц лент и публикации.
+
+Включается настройкой BLOG_TEMPLATE_ENGINE = 'jinja2'; шаблоны лежат
+в каталоге jinja2/ и повторяют вёрстку шаблонов Django из templates/.
+"""
+from django.conf import settings
+from django.template import defaultfilters
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.formats import localize
+from django.utils.timezone import template_localtime
+from django_bootstrap5.components import render_button
+from django_bootstrap5.forms import render_form
+from jinja2 import Environment, pass_environment
+from markupsafe import Markup
+
+from blog.caching import MISS, STALE, feed_cache, make_key
+from blog.templatetags import blog_images
+from blog.templatetags.blog_assets import stylesheet
+from blog.url_prefixes import fast_reverse
+
+
+def url(viewname, *args, **kwargs):
+    if kwargs:
+        return reverse(viewname, args=args or None, kwargs=kwargs)
+    return fast_reverse(viewname, *args)
+
+
+def date(value, arg=None):
+    """Фильтр date из Django: d E Y даёт «05 января 2026»."""
+    return defaultfilters.date(template_localtime(value), arg)
+
+
+def localized(value):
+    """Значение в том виде, в каком его выводит {{ value }} в Django."""
+    return localize(template_localtime(value))
+
+
+def linebreaksbr(value):
+    return defaultfilters.linebreaksbr(value, autoescape=True)
+
+
+def truncatewords(value, length):
+    return defaultfilters.truncatewords(value, length)
+
+
+@pass_environment
+def post_image(environment, post, variant):
+    template = environment.get_template('includes/post_image.html')
+    return Markup(template.render(blog_images.post_image(post, variant)))
+
+
+@pass_environment
+def swrcache(environment, fragment_name, template_name, *vary_on, **values):
+    """Аналог {% swrcache %} для шаблонов Jinja2.
+
+    Фрагмент — шаблон template_name, отрисованный только с values:
+    фоновое обновление выполняется позже, когда переменные цикла, в
+    котором вызван swrcache, уже другие.
+    """
+    def render():
+        return environment.get_template(template_name).render(values)
+
+    if not settings.FEED_CACHE_ENABLED:
+        return Markup(render())
+    # Разметка движков различается пробелами, поэтому ключи у них свои.
+    key = make_key(f'fragment:jinja2:{fragment_name}', *vary_on)
+    value, state = feed_cache.lookup(key)
+    if state == MISS:
+        value = render()
+        feed_cache.set(key, value)
+    elif state == STALE:
+        feed_cache.revalidate(key, render)
+    return Markup(value)
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        'url': url,
+        'static': static,
+        'stylesheet': stylesheet,
+        'post_image': post_image,
+        'swrcache': swrcache,
+        'bootstrap_form': render_form,
+        'bootstrap_button': render_button,
+    })
+    env.filters.update({
+        'date': date,
+        'localized': localized,
+        'linebreaksbr': linebreaksbr,
+        'truncatewords': truncatewords,
+    })
+    return env
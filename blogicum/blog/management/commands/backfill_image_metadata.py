@@ -0,0 +1,55 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from blog.images import read_metadata
+from blog.models import ImageMetadata, Post
+
+
+class Command(BaseCommand):
+    help = ('Заполняет размеры, объём и формат фото публикаций, '
+            'загруженных до появления этих полей.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help='Сколько записей создавать одним запросом.')
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Сколько файлов читать одновременно.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Post.objects.exclude(image='').filter(
+            image_metadata__isnull=True).only('id', 'image').order_by('id')
+        created = unreadable = 0
+        last_id = 0
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            while True:
+                # Обход по возрастанию id: нечитаемые фото не выбираются
+                # повторно.
+                batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                records = []
+                for post, metadata in zip(batch, executor.map(
+                        lambda post: read_metadata(post.image), batch)):
+                    if metadata is None:
+                        unreadable += 1
+                        self.stderr.write(
+                            f'Публикация {post.id}: не удалось прочитать '
+                            f'{post.image.name}')
+                        continue
+                    records.append(ImageMetadata(post=post, **metadata))
+                # Запись могла появиться, пока читались файлы, если автор
+                # за это время заменил фото.
+                ImageMetadata.objects.bulk_create(
+                    records, ignore_conflicts=True)
+                created += len(records)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Заполнено публикаций: {created}, нечитаемых фото: '
+            f'{unreadable}, время: {elapsed:.2f} с.'))
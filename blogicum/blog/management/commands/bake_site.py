@@ -0,0 +1,97 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import override_settings
+from django.utils import timezone
+
+from blog.baking import (
+    bake_page, collect_pages, page_file, read_manifest, remove_page,
+    write_manifest)
+
+
+class Command(BaseCommand):
+    help = ('Выгружает в статические файлы ленты, опубликованные '
+            'категории, профили и страницы публикаций. Повторная выгрузка '
+            'перерисовывает только изменившиеся страницы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default=settings.BAKE_ROOT,
+            help='Каталог выгрузки (по умолчанию BAKE_ROOT).')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов для отрисовки (1 — в текущем процессе).')
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Перерисовать все страницы, а не только изменившиеся.')
+
+    def handle(self, *args, **options):
+        root = Path(options['output'])
+        started = time.monotonic()
+        previous = read_manifest(root)['pages']
+        # Страницы отрисовываются целиком и заново, а не из кеша лент.
+        with override_settings(
+                FEED_CACHE_ENABLED=False, FEED_STREAMING=False,
+                TEMPLATE_PROFILING=False):
+            versions = {}
+            for url, version in collect_pages().items():
+                if page_file(url) is None:
+                    self.stderr.write(f'{url}: пропущен, недопустимый путь.')
+                else:
+                    versions[url] = version
+            stale = [
+                url for url, version in versions.items()
+                if options['full']
+                or previous.get(url, {}).get('version') != version
+                or not (root / page_file(url)).exists()
+            ]
+            results = self.bake(stale, root, options['workers'])
+
+        baked_at = timezone.now().isoformat()
+        pages, failed = {}, 0
+        for url, version in versions.items():
+            result = results.get(url)
+            if isinstance(result, int):
+                pages[url] = {
+                    'file': page_file(url), 'version': version,
+                    'baked_at': baked_at, 'size': result,
+                }
+                continue
+            if result is not None:
+                failed += 1
+                self.stderr.write(f'{url}: {result}')
+            if url in previous:
+                # Старая версия остаётся на диске и в манифесте до
+                # следующей удачной выгрузки.
+                pages[url] = previous[url]
+        write_manifest(root, {'baked_at': baked_at, 'pages': pages})
+        removed = [url for url in previous if url not in pages]
+        for url in removed:
+            remove_page(root, previous[url]['file'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Страниц: {len(pages)}; перерисовано: {len(stale) - failed}, '
+            f'без изменений: {len(versions) - len(stale)}, '
+            f'удалено: {len(removed)}, ошибок: {failed}; '
+            f'время: {time.monotonic() - started:.2f} с.'))
+
+    def bake(self, urls, root, workers):
+        if workers <= 1 or len(urls) < 2:
+            return dict(bake_page(url, root) for url in urls)
+        # Процессы запускаются через fork и наследуют настройки и
+        # разобранные шаблоны; соединения с базой закрываются заранее,
+        # чтобы процессы не делили одно.
+        connections.close_all()
+        with ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context('fork')
+        ) as executor:
+            return dict(executor.map(
+                bake_page, urls, repeat(str(root)),
+                chunksize=max(len(urls) // (workers * 4), 1)))
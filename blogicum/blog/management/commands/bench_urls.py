@@ -0,0 +1,78 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from blog.models import Category, Comment, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает построение адресов для страницы с комментариями '
+            'через reverse() и через get_absolute_url() моделей.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--comments', type=int, default=500,
+            help='Сколько комментариев на странице.')
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз построить адреса всей страницы.')
+
+    def handle(self, *args, **options):
+        # Объекты не сохраняются: замеряется только построение адресов.
+        post = Post(pk=1, category=Category(slug='travel'))
+        comments = [
+            Comment(pk=number, post=post,
+                    author=User(username=f'reader.{number}@example'))
+            for number in range(1, options['comments'] + 1)
+        ]
+
+        def with_reverse():
+            urls = [reverse('blog:post_detail', args=[post.pk]),
+                    reverse('blog:category_posts', args=[post.category.slug])]
+            for comment in comments:
+                urls += [
+                    reverse('blog:profile', args=[comment.author.username]),
+                    reverse('blog:edit_comment',
+                            args=[comment.post_id, comment.pk]),
+                    reverse('blog:delete_comment',
+                            args=[comment.post_id, comment.pk]),
+                ]
+            return urls
+
+        def with_methods():
+            urls = [post.get_absolute_url(),
+                    post.category.get_absolute_url()]
+            for comment in comments:
+                urls += [
+                    comment.author.get_absolute_url(),
+                    comment.get_edit_url(),
+                    comment.get_delete_url(),
+                ]
+            return urls
+
+        if with_reverse() != with_methods():
+            raise CommandError('Адреса, построенные двумя способами, '
+                               'различаются.')
+        timings = [
+            self.measure(build, options['repeat'])
+            for build in (with_reverse, with_methods)
+        ]
+        count = len(with_methods())
+        for name, timing in zip(('reverse()', 'get_absolute_url()'),
+                                timings):
+            self.stdout.write(
+                f'{name:<20}{timing * 1000:>8.2f} мс на страницу, '
+                f'{timing / count * 1e6:.2f} мкс на адрес')
+        self.stdout.write(self.style.SUCCESS(
+            f'Адресов на странице: {count}; ускорение '
+            f'{timings[0] / timings[1]:.1f}×.'))
+
+    def measure(self, build, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            build()
+        return (time.perf_counter() - started) / repeat
@@ -0,0 +1,104 @@
+import pickle
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import reverse
+
+from blog.cache_compression import (
+    average, compression_stats, get_codec, lz4)
+from blog.caching import render_internal
+from blog.models import Category, Post
+from blog.query_utils import get_optimized_post_queryset
+
+
+class Command(BaseCommand):
+    help = ('Показывает степень сжатия и затраты процессора на сжатие '
+            'кешируемых страниц по семействам ключей: по данным кеша лент '
+            'и в сравнении кодеков.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--samples', type=int, default=5,
+            help='Сколько страниц каждого семейства взять для оценки.')
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз повторить сжатие для замера времени.')
+
+    def handle(self, *args, **options):
+        families = self.get_samples(options['samples'])
+        self.report_cache(families)
+        codecs = ['zlib'] + (['lz4'] if lz4 is not None else [])
+        self.stdout.write(
+            f'{"семейство":<12}{"кодек":<7}{"байт":>10}{"сжато":>10}'
+            f'{"степень":>9}{"сжатие, мкс":>13}{"распак., мкс":>14}')
+        for family, paths in families.items():
+            raw = [
+                pickle.dumps(
+                    {'content': render_internal(path).content},
+                    pickle.HIGHEST_PROTOCOL)
+                for path in paths
+            ]
+            if not raw:
+                continue
+            for codec in codecs:
+                self.report_codec(family, codec, raw, options['repeat'])
+
+    def report_cache(self, families):
+        # Страницы проходят через кеш лент дважды: при записи они
+        # сжимаются, при чтении распаковываются, и compression_stats
+        # собирает те же замеры, что и в рабочих процессах.
+        compression_stats.reset()
+        with override_settings(FEED_CACHE_ENABLED=True):
+            for paths in families.values():
+                for path in paths:
+                    render_internal(path)
+                    render_internal(path)
+        self.stdout.write(
+            f'{"семейство ключей":<24}{"записей":>8}{"степень":>9}'
+            f'{"сжатие, мкс":>13}{"распак., мкс":>14}')
+        for family, stats in sorted(compression_stats.report().items()):
+            compress = average(stats, 'compress_seconds', 'compressed')
+            decompress = average(stats, 'decompress_seconds', 'decompressed')
+            self.stdout.write(
+                f'{family:<24}{stats.get("compressed", 0):>8.0f}'
+                f'{stats["ratio"]:>9.1f}'
+                f'{compress * 1e6:>13.0f}{decompress * 1e6:>14.0f}')
+        self.stdout.write('')
+
+    def get_samples(self, samples):
+        posts = get_optimized_post_queryset(
+            Post.objects, apply_annotation=False
+        ).values_list('id', flat=True)[:samples]
+        slugs = Category.objects.filter(
+            is_published=True).values_list('slug', flat=True)[:samples]
+        return {
+            'index': [reverse('blog:index')],
+            'category': [
+                reverse('blog:category_posts', args=[slug]) for slug in slugs
+            ],
+            'post': [
+                reverse('blog:post_detail', args=[post_id])
+                for post_id in posts
+            ],
+        }
+
+    def report_codec(self, family, codec, raw, repeat):
+        _, compress, decompress = get_codec(codec)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            compressed = [compress(data) for data in raw]
+        compress_time = (time.perf_counter() - started) / repeat / len(raw)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for data in compressed:
+                decompress(data)
+        decompress_time = (
+            (time.perf_counter() - started) / repeat / len(raw))
+
+        raw_size = sum(map(len, raw))
+        stored_size = sum(map(len, compressed))
+        self.stdout.write(
+            f'{family:<12}{codec:<7}{raw_size:>10}{stored_size:>10}'
+            f'{raw_size / stored_size:>9.1f}'
+            f'{compress_time * 1e6:>13.0f}{decompress_time * 1e6:>14.0f}')
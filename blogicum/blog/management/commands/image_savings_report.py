@@ -0,0 +1,61 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+
+# Ширина, которую браузер выбирает из srcset для карточки на обычном
+# экране и на экране с двойной плотностью пикселей.
+REPORT_WIDTHS = (640, 1280)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает объём оригиналов фото с объёмом копий, которые '
+            'загружает браузер.')
+
+    def handle(self, *args, **options):
+        totals = defaultdict(int)
+        posts = Post.objects.filter(
+            image_status=Post.ImageStatus.READY
+        ).only('image', 'image_variants')
+        # Одинаковые фото хранятся одним файлом, их копии — тоже.
+        seen = set()
+        for post in posts.iterator():
+            if post.image.name in seen:
+                continue
+            try:
+                sizes = self.sizes(post)
+            except (OSError, KeyError):
+                continue
+            seen.add(post.image.name)
+            for label, size in sizes.items():
+                totals[label] += size
+        count = len(seen)
+
+        if not count:
+            self.stdout.write('Нет обработанных фото.')
+            return
+        original = totals.pop('оригинал')
+        self.stdout.write(
+            f'Фото: {count}, оригиналы: {original / 1024:.0f} КБ')
+        for label, size in totals.items():
+            saved = 100 * (1 - size / original)
+            self.stdout.write(
+                f'{label:<12}{size / 1024:>10.0f} КБ{saved:>8.1f} % экономии')
+
+    def sizes(self, post):
+        storage = post.image.storage
+        variants = post.image_variants
+        sizes = {
+            'оригинал': post.image.size,
+            'card': storage.size(variants['card']),
+        }
+        for extension, sources in variants['srcset'].items():
+            for width in REPORT_WIDTHS:
+                sizes[f'{extension} {width}w'] = storage.size(
+                    self.closest(sources, width))
+        return sizes
+
+    @staticmethod
+    def closest(sources, width):
+        return min(sources, key=lambda source: abs(source[0] - width))[1]
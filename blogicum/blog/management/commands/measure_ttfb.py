@@ -0,0 +1,55 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время до первого байта и до конца ответа для '
+            'страницы ленты с потоковой отдачей и без неё.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*', default=['/'],
+            help='Адреса страниц (по умолчанию главная).')
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз запросить каждую страницу.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"страница":<36}{"режим":<10}'
+            f'{"TTFB, мс":>10}{"всего, мс":>11}{"байт":>9}')
+        for path in options['paths']:
+            for streaming in (False, True):
+                ttfb, total, size = self.measure(
+                    path, streaming, options['repeat'])
+                self.stdout.write(
+                    f'{path[-35:]:<36}'
+                    f'{"поток" if streaming else "целиком":<10}'
+                    f'{ttfb * 1000:>10.1f}{total * 1000:>11.1f}{size:>9}')
+
+    def measure(self, path, streaming, repeat):
+        client = Client()
+        ttfbs, totals = [], []
+        # Из кеша лент страницы отдаются целиком, поэтому он выключается.
+        with override_settings(
+                FEED_STREAMING=streaming, FEED_CACHE_ENABLED=False):
+            for _ in range(repeat):
+                started = time.perf_counter()
+                response = client.get(path)
+                if response.status_code != 200:
+                    raise CommandError(
+                        f'{path}: ответ {response.status_code}.')
+                if response.streaming:
+                    chunks = iter(response.streaming_content)
+                    body = next(chunks, b'')
+                    ttfbs.append(time.perf_counter() - started)
+                    body += b''.join(chunks)
+                    response.close()
+                else:
+                    body = response.content
+                    ttfbs.append(time.perf_counter() - started)
+                totals.append(time.perf_counter() - started)
+        return statistics.median(ttfbs), statistics.median(totals), len(body)
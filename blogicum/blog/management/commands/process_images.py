@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from blog.image_tasks import process_post_image
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Обрабатывает фото публикаций, застрявшие в очереди, '
+            'и повторяет обработку после ошибок.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--failed', action='store_true',
+            help='Повторить обработку фото, завершившуюся ошибкой.')
+        parser.add_argument(
+            '--missing', action='store_true',
+            help='Обработать фото, загруженные до появления вариантов.')
+
+    def handle(self, *args, **options):
+        statuses = [Post.ImageStatus.PENDING]
+        if options['failed']:
+            statuses.append(Post.ImageStatus.FAILED)
+        condition = Q(image_status__in=statuses)
+        if options['missing']:
+            condition |= Q(image_status=Post.ImageStatus.NONE)
+        post_ids = list(Post.objects.filter(condition).exclude(
+            image='').values_list('id', flat=True))
+
+        for post_id in post_ids:
+            process_post_image(post_id)
+
+        failed = Post.objects.filter(
+            image_status=Post.ImageStatus.FAILED
+        ).values_list('id', 'image_error')
+        for post_id, error in failed:
+            self.stderr.write(f'Публикация {post_id}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано публикаций: {len(post_ids)}, '
+            f'с ошибками: {len(failed)}.'))
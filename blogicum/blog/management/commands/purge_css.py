@@ -0,0 +1,92 @@
+import gzip
+import os
+
+from django.conf import settings
+from django.contrib.auth.forms import (
+    AuthenticationForm, PasswordResetForm, SetPasswordForm, UserCreationForm)
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django_bootstrap5.components import render_button
+from django_bootstrap5.forms import render_form
+
+from blog.css_purge import compile_safelist, extract_tokens, purge
+from blog.forms import CommentForm, PostForm, UserProfileForm
+from blog.template_warmup import project_template_dirs
+
+
+def iter_templates():
+    # Шаблоны сторонних приложений вроде админки в публичные страницы
+    # не попадают.
+    for directory in project_template_dirs():
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                if filename.endswith(('.html', '.txt')):
+                    yield os.path.join(root, filename)
+
+
+def render_bootstrap_samples():
+    """HTML, который django_bootstrap5 выводит для форм проекта.
+
+    Формы отрисовываются и пустыми, и с ошибками, чтобы попали классы
+    вроде is-invalid и invalid-feedback.
+    """
+    forms = [
+        PostForm, CommentForm, UserProfileForm, UserCreationForm,
+        AuthenticationForm, PasswordResetForm,
+    ]
+    html = [render_button('Отправить', button_type='submit')]
+    for form_class in forms:
+        html.append(render_form(form_class()))
+        html.append(render_form(form_class(data={})))
+    html.append(render_form(SetPasswordForm(None, data={})))
+    return '\n'.join(html)
+
+
+class Command(BaseCommand):
+    help = ('Удаляет из CSS Bootstrap правила для классов, которых нет '
+            'в шаблонах проекта.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source', default='css/bootstrap.min.css',
+            help='Исходный файл среди статики.')
+        parser.add_argument(
+            '--output', default=None,
+            help='Куда записать результат (по умолчанию *.purged.css '
+                 'рядом с исходным файлом).')
+        parser.add_argument(
+            '--safelist', action='append', default=[],
+            help='Регулярное выражение для классов, которые нужно '
+                 'сохранить; можно указать несколько раз.')
+
+    def handle(self, *args, **options):
+        source = finders.find(options['source'])
+        if source is None:
+            raise CommandError(f'Файл {options["source"]} не найден.')
+        output = options['output'] or source.replace('.min.css', '.purged.css')
+        if output == source:
+            raise CommandError('Укажите --output.')
+
+        used = set()
+        for path in iter_templates():
+            with open(path, encoding='utf-8') as template:
+                used |= extract_tokens(template.read())
+        used |= extract_tokens(render_bootstrap_samples())
+        safelist = compile_safelist(
+            list(settings.CSS_PURGE_SAFELIST) + options['safelist'])
+
+        with open(source, encoding='utf-8') as css_file:
+            css = css_file.read()
+        purged, stats = purge(css, used, safelist)
+        with open(output, 'w', encoding='utf-8') as css_file:
+            css_file.write(purged)
+
+        before, after = len(css.encode()), len(purged.encode())
+        before_gz = len(gzip.compress(css.encode(), 9))
+        after_gz = len(gzip.compress(purged.encode(), 9))
+        self.stdout.write(
+            f'Правил: {stats["rules"]}, оставлено: {stats["kept"]}.')
+        self.stdout.write(self.style.SUCCESS(
+            f'{os.path.basename(output)}: {before} -> {after} байт '
+            f'({after / before:.0%}), gzip: {before_gz} -> {after_gz} '
+            f'байт ({after_gz / before_gz:.0%}).'))
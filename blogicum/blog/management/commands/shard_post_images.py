@@ -0,0 +1,146 @@
+import hashlib
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.caching import bump_generation
+from blog.images import SHARDED_NAME, shard_name
+from blog.models import Post, StoredImage
+from blog.surrogate import purge_batcher
+
+
+def content_name(storage, name):
+    """Имя, под которым ContentAddressedStorage сохранила бы файл."""
+    digest = hashlib.sha256()
+    with storage.open(name, 'rb') as content:
+        for chunk in content.chunks():
+            digest.update(chunk)
+    return shard_name(digest.hexdigest(), name)
+
+
+def copy_file(storage, old_name, new_name):
+    """Копирует файл, если на новом месте его ещё нет.
+
+    Оригинал не удаляется: его удалит StoredImage.release() после
+    фиксации транзакции, когда на него не останется ссылок.
+    """
+    if storage.exists(new_name):
+        return
+    with storage.open(old_name, 'rb') as content:
+        storage.save(new_name, content)
+
+
+def rename_variants(variants, old_name, new_name):
+    # Имена вариантов начинаются с имени оригинала.
+    if isinstance(variants, dict):
+        return {
+            key: rename_variants(value, old_name, new_name)
+            for key, value in variants.items()
+        }
+    if isinstance(variants, list):
+        return [rename_variants(value, old_name, new_name)
+                for value in variants]
+    if isinstance(variants, str) and (
+            variants == old_name or variants.startswith(f'{old_name}.')):
+        return new_name + variants[len(old_name):]
+    return variants
+
+
+class Command(BaseCommand):
+    help = ('Переносит фото публикаций из плоского каталога post_images '
+            'в подкаталоги post_images/ab/cd/. Команду можно прервать '
+            'и запустить снова.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько публикаций обновлять в одной транзакции.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, какие файлы будут перенесены.')
+
+    def handle(self, *args, **options):
+        # Фото в обработке пропускаются: фоновая задача не найдёт
+        # переименованный файл. Их перенесёт следующий запуск.
+        queryset = Post.objects.exclude(image='').exclude(
+            image__regex=SHARDED_NAME.pattern
+        ).exclude(
+            image_status=Post.ImageStatus.PENDING
+        ).only('id', 'image', 'image_variants').order_by('id')
+        moved = failed = 0
+        last_id = 0
+        while True:
+            batch = list(
+                queryset.filter(id__gt=last_id)[:options['batch_size']])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            if options['dry_run']:
+                for post in batch:
+                    try:
+                        target = self.target(post)
+                    except OSError as error:
+                        failed += 1
+                        self.stderr.write(f'Публикация {post.id}: {error}')
+                        continue
+                    self.stdout.write(f'{post.image.name} -> {target}')
+                    moved += 1
+                continue
+            updates = []
+            for post in batch:
+                try:
+                    updates.append(self.move(post))
+                except OSError as error:
+                    failed += 1
+                    self.stderr.write(f'Публикация {post.id}: {error}')
+            moved += self.save(updates)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Будет перенесено" if options["dry_run"] else "Перенесено"} '
+            f'фото: {moved}, ошибок: {failed}.'))
+
+    def target(self, post):
+        # Имя — хеш содержимого, как у новых загрузок: одинаковые фото
+        # сходятся в один файл, а после прерывания уже скопированные
+        # файлы находятся на своих местах.
+        return content_name(post.image.storage, post.image.name)
+
+    def move(self, post):
+        storage = post.image.storage
+        old_name, new_name = post.image.name, self.target(post)
+        variants = rename_variants(post.image_variants, old_name, new_name)
+        copy_file(storage, old_name, new_name)
+        for old_variant, new_variant in self.variant_pairs(
+                post.image_variants, variants):
+            if storage.exists(old_variant):
+                copy_file(storage, old_variant, new_variant)
+        return post, old_name, new_name, variants
+
+    def variant_pairs(self, old, new):
+        if isinstance(old, dict):
+            for key, value in old.items():
+                if key != 'source':
+                    yield from self.variant_pairs(value, new[key])
+        elif isinstance(old, list):
+            for old_value, new_value in zip(old, new):
+                yield from self.variant_pairs(old_value, new_value)
+        elif isinstance(old, str) and old != new:
+            yield old, new
+
+    def save(self, updates):
+        saved = 0
+        with transaction.atomic():
+            for post, old_name, new_name, variants in updates:
+                # Если автор успел заменить фото, запись не трогаем.
+                if not Post.objects.filter(
+                    pk=post.id, image=old_name
+                ).update(image=new_name, image_variants=variants):
+                    continue
+                saved += 1
+                storage = post.image.storage
+                StoredImage.acquire(new_name, storage)
+                StoredImage.release(old_name, post.image_variants, storage)
+            purge_batcher.add({f'post-{post.id}' for post, *_ in updates})
+        if saved:
+            bump_generation()
+        return saved
@@ -0,0 +1,79 @@
+import os
+import time
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+from django.views.static import serve
+
+from blog.media import serve_static
+from blog.storage import COMPRESSIBLE, HASHED_NAME
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает размер собранной статики без сжатия, с gzip '
+            'и brotli, и время ответа встроенного сервера статики.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=50,
+            help='Сколько раз запросить каждый файл для замера времени.')
+
+    def handle(self, *args, **options):
+        root = settings.STATIC_ROOT
+        if not root or not os.path.isdir(root):
+            raise CommandError(
+                'STATIC_ROOT пуст — сначала выполните collectstatic.')
+        names = sorted(
+            os.path.relpath(os.path.join(directory, filename), root)
+            for directory, _, filenames in os.walk(root)
+            for filename in filenames
+            if HASHED_NAME.search(filename) and filename.endswith(COMPRESSIBLE)
+        )
+        if not names:
+            raise CommandError(
+                'Нет файлов с хешем в имени — включите STATICFILES_STORAGE '
+                '= blog.storage.CompressedManifestStaticFilesStorage.')
+
+        self.stdout.write(
+            f'{"файл":<44}{"байт":>9}{"gzip":>9}{"br":>9}'
+            f'{"serve, мкс":>12}{"gzip, мкс":>11}{"br, мкс":>10}')
+        totals = [0, 0, 0]
+        for name in names:
+            path = os.path.join(root, name)
+            sizes = [os.path.getsize(path)] + [
+                os.path.getsize(path + suffix)
+                if os.path.exists(path + suffix) else os.path.getsize(path)
+                for suffix in ('.gz', '.br')
+            ]
+            totals = [total + size for total, size in zip(totals, sizes)]
+            timings = [
+                self.measure(serve, name, '', options['repeat'],
+                             document_root=root),
+                self.measure(serve_static, name, 'gzip', options['repeat']),
+                self.measure(serve_static, name, 'br', options['repeat']),
+            ]
+            self.stdout.write(
+                f'{name[-43:]:<44}{sizes[0]:>9}{sizes[1]:>9}{sizes[2]:>9}'
+                + ''.join(
+                    f'{timing * 1e6:>{width}.0f}'
+                    for timing, width in zip(timings, (12, 11, 10))))
+        self.stdout.write(self.style.SUCCESS(
+            f'Всего: {totals[0]} байт, gzip: {totals[1]} '
+            f'({totals[1] / totals[0]:.0%}), br: {totals[2]} '
+            f'({totals[2] / totals[0]:.0%}); '
+            f'хранилище: {staticfiles_storage.__class__.__name__}.'))
+
+    def measure(self, view, name, encoding, repeat, **kwargs):
+        factory = RequestFactory()
+        started = time.perf_counter()
+        with override_settings(STATIC_SERVE=True):
+            for _ in range(repeat):
+                request = factory.get(
+                    f'{settings.STATIC_URL}{name}',
+                    HTTP_ACCEPT_ENCODING=encoding)
+                response = view(request, name, **kwargs)
+                b''.join(response.streaming_content)
+                response.close()
+        return (time.perf_counter() - started) / repeat
@@ -0,0 +1,137 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.images import UPLOAD_DIR, candidate_names
+from blog.models import Post, StoredImage
+
+
+def iter_files(root, prefix):
+    """Обходит дерево и выдаёт (имя, запись) в порядке сравнения строк."""
+    with os.scandir(root) as entries:
+        entries = list(entries)
+    # Имена внутри каталога сравниваются как «каталог/», поэтому порядок
+    # выдачи совпадает с сортировкой полных путей, как в ORDER BY.
+    entries.sort(key=lambda entry: (
+        entry.name + '/' if entry.is_dir(follow_symlinks=False)
+        else entry.name))
+    for entry in entries:
+        name = f'{prefix}/{entry.name}'
+        if entry.is_dir(follow_symlinks=False):
+            yield from iter_files(entry.path, name)
+        elif entry.is_file(follow_symlinks=False):
+            yield name, entry
+
+
+def iter_referenced(chunk_size):
+    names = Post.objects.exclude(image='').order_by('image').values_list(
+        'image', flat=True).iterator(chunk_size=chunk_size)
+    previous = ''
+    for name in names:
+        if name < previous:
+            raise CommandError(
+                'База данных сортирует имена файлов не побайтно — '
+                'сравнение с файлами на диске невозможно.')
+        previous = name
+        yield name
+
+
+def owns(name, filename):
+    # Файл принадлежит фото, если это оригинал или его вариант:
+    # <имя>.card.jpg, <имя>.w320.webp и т. д.
+    return filename == name or filename.startswith(f'{name}.')
+
+
+def iter_orphans(files, referenced):
+    """Сравнивает два отсортированных потока слиянием.
+
+    В стеке лежат имена фото, которые являются префиксами текущего файла:
+    только они могут оказаться его оригиналом.
+    """
+    referenced = iter(referenced)
+    pending = next(referenced, None)
+    stack = []
+    for filename, entry in files:
+        while pending is not None and pending <= filename:
+            while stack and not pending.startswith(stack[-1]):
+                stack.pop()
+            stack.append(pending)
+            pending = next(referenced, None)
+        while stack and not filename.startswith(stack[-1]):
+            stack.pop()
+        if not any(owns(name, filename) for name in stack):
+            yield filename, entry
+
+
+class Command(BaseCommand):
+    help = ('Удаляет из MEDIA_ROOT файлы фото, на которые не ссылается '
+            'ни одна публикация.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float, default=24,
+            help='Не трогать файлы моложе стольких часов: они могут '
+                 'принадлежать ещё не сохранённой публикации.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько файлов удалять за один проход.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено.')
+
+    def handle(self, *args, **options):
+        root = os.path.join(settings.MEDIA_ROOT, UPLOAD_DIR)
+        if not os.path.isdir(root):
+            self.stdout.write('Каталог с фото не найден — удалять нечего.')
+            return
+        deadline = time.time() - options['grace_hours'] * 3600
+        found = removed = kept = size = 0
+        batch = []
+        for filename, entry in iter_orphans(
+                iter_files(root, UPLOAD_DIR),
+                iter_referenced(options['batch_size'])):
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > deadline:
+                kept += 1
+                continue
+            found += 1
+            size += stat.st_size
+            if options['dry_run']:
+                self.stdout.write(filename)
+                continue
+            batch.append(filename)
+            if len(batch) >= options['batch_size']:
+                removed += self.delete(batch)
+                batch = []
+        if batch:
+            removed += self.delete(batch)
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Будет удалено файлов: {found} ({size / 2 ** 20:.1f} МБ), '
+                f'моложе срока ожидания: {kept}.'))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено файлов: {removed} ({size / 2 ** 20:.1f} МБ), '
+            f'моложе срока ожидания: {kept}.'))
+
+    def delete(self, batch):
+        # Пока шёл обход, на файл могла сослаться новая публикация
+        # с тем же фото.
+        candidates = {
+            name for filename in batch for name in candidate_names(filename)}
+        referenced = set(Post.objects.filter(
+            image__in=candidates).values_list('image', flat=True))
+        removed = []
+        for filename in batch:
+            if any(owns(name, filename) for name in referenced):
+                continue
+            try:
+                os.remove(os.path.join(settings.MEDIA_ROOT, filename))
+            except FileNotFoundError:
+                continue
+            removed.append(filename)
+        StoredImage.objects.filter(name__in=removed).delete()
+        return len(removed)
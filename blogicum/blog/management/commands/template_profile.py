@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from blog.template_profiler import ProfileStats, install, profile_render
+
+
+class Command(BaseCommand):
+    help = ('Отрисовывает страницы и показывает, сколько времени заняли '
+            'отдельные шаблоны и теги.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*', default=['/'],
+            help='Адреса страниц (по умолчанию главная).')
+        parser.add_argument(
+            '--repeat', type=int, default=10,
+            help='Сколько раз отрисовать каждую страницу.')
+        parser.add_argument(
+            '--user', default=None,
+            help='Имя пользователя, от которого открывать страницы.')
+        parser.add_argument(
+            '--limit', type=int, default=20,
+            help='Сколько строк показать.')
+
+    def handle(self, *args, **options):
+        install()
+        stats = ProfileStats()
+        # Страницы должны отрисовываться целиком и без кеша лент, а
+        # middleware профилирования не должен перехватить замеры.
+        with override_settings(
+                FEED_CACHE_ENABLED=False, FEED_STREAMING=False,
+                BLOG_TEMPLATE_ENGINE='django', TEMPLATE_PROFILING=False):
+            client = Client()
+            if options['user']:
+                user = get_user_model().objects.filter(
+                    username=options['user']).first()
+                if user is None:
+                    raise CommandError(
+                        f'Пользователь {options["user"]} не найден.')
+                client.force_login(user)
+            for path in options['paths']:
+                for _ in range(options['repeat']):
+                    with profile_render() as profile:
+                        response = client.get(path)
+                    if response.status_code != 200:
+                        raise CommandError(
+                            f'{path}: ответ {response.status_code}.')
+                    stats.record(profile)
+
+        requests, report = stats.report()
+        total = sum(stat[2] for stat in report.values())
+        self.stdout.write(
+            f'{"шаблон или тег":<48}{"вызовов":>9}{"полное, мс":>12}'
+            f'{"своё, мс":>10}{"доля":>7}')
+        rows = sorted(report.items(), key=lambda item: item[1][2],
+                      reverse=True)
+        for name, (calls, cumulative, own) in rows[:options['limit']]:
+            self.stdout.write(
+                f'{name[-47:]:<48}{calls / requests:>9.1f}'
+                f'{cumulative / requests * 1000:>12.2f}'
+                f'{own / requests * 1000:>10.2f}'
+                f'{own / total if total else 0:>7.0%}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Запросов: {requests}; в шаблонах в среднем '
+            f'{total / requests * 1000:.1f} мс на запрос.'))
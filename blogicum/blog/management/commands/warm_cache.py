@@ -0,0 +1,115 @@
+import threading
+import time
+from math import ceil
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Count
+from django.urls import reverse
+
+from blog.caching import render_internal
+from blog.models import Category, Post
+from blog.query_utils import get_optimized_post_queryset
+
+
+class RateLimiter:
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self._lock = threading.Lock()
+        self._next_at = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Command(BaseCommand):
+    help = ('Заполняет кеш лент: первые страницы главной, страницы '
+            'опубликованных категорий и самые обсуждаемые публикации.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=3,
+            help='Сколько первых страниц главной прогреть.')
+        parser.add_argument(
+            '--top-posts', type=int, default=20,
+            help='Сколько публикаций с наибольшим числом комментариев '
+                 'прогреть.')
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Размер пула потоков.')
+        parser.add_argument(
+            '--rate', type=float, default=20,
+            help='Не больше стольких отрисовок в секунду (0 — без '
+                 'ограничения).')
+
+    def handle(self, *args, **options):
+        if not settings.FEED_CACHE_ENABLED:
+            self.stderr.write(
+                'FEED_CACHE_ENABLED выключен — прогревать нечего.')
+            return
+        if 'locmem' in caches[settings.FEED_CACHE_ALIAS].__module__:
+            self.stderr.write(self.style.WARNING(
+                'Кеш хранится в памяти процесса: записи, прогретые этой '
+                'командой, не увидят рабочие процессы сервера.'))
+
+        targets = list(self.get_targets(options))
+        limiter = RateLimiter(options['rate'])
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            results = list(executor.map(
+                lambda target: self.warm(target, limiter), targets))
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрето записей: {results.count("MISS")}, '
+            f'уже были в кеше: {results.count("HIT")}, '
+            f'ошибок: {results.count(None)}; всего страниц: {len(targets)}, '
+            f'время: {elapsed:.2f} с.'))
+
+    def get_targets(self, options):
+        index_url = reverse('blog:index')
+        yield index_url, ''
+        total = get_optimized_post_queryset(apply_annotation=False).count()
+        last_page = min(options['pages'], ceil(total / settings.MAX_POSTS))
+        for page in range(2, last_page + 1):
+            yield index_url, f'page={page}'
+
+        slugs = Category.objects.filter(
+            is_published=True).values_list('slug', flat=True)
+        for slug in slugs:
+            yield reverse('blog:category_posts', args=[slug]), ''
+
+        # Просмотры не учитываются, поэтому популярность публикации
+        # оценивается по числу комментариев.
+        top_posts = get_optimized_post_queryset(
+            Post.objects, apply_annotation=False
+        ).annotate(
+            comment_count=Count('comments')
+        ).order_by('-comment_count', '-pub_date').values_list(
+            'id', flat=True)[:options['top_posts']]
+        for post_id in top_posts:
+            yield reverse('blog:post_detail', args=[post_id]), ''
+
+    def warm(self, target, limiter):
+        path, query_string = target
+        limiter.wait()
+        try:
+            response = render_internal(path, query_string)
+        except Exception as error:
+            self.stderr.write(f'{path}?{query_string}: {error}')
+            return None
+        finally:
+            connections.close_all()
+        if response.status_code != 200:
+            return None
+        return response.get('X-Cache')
@@ -0,0 +1,209 @@
+import mimetypes
+import os
+import re
+from stat import S_ISREG
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils import timezone
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from .images import UPLOAD_DIR, candidate_names
+from .models import Post
+from .storage import HASHED_NAME
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+# Сжатые копии статики в порядке предпочтения.
+STATIC_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def get_visibility(name, user):
+    """Возвращает 'public', 'private' или None, если файл показывать нельзя.
+
+    Одно и то же фото может принадлежать нескольким публикациям: файл
+    открыт всем, если опубликована хотя бы одна из них.
+    """
+    if not name.startswith(f'{UPLOAD_DIR}/'):
+        return 'public'
+    posts = Post.objects.filter(image__in=candidate_names(name))
+    if posts.filter(
+        is_published=True,
+        category__is_published=True,
+        pub_date__lte=timezone.now(),
+    ).exists():
+        return 'public'
+    if user.is_authenticated and posts.filter(author=user).exists():
+        return 'private'
+    return None
+
+
+def parse_range(header, size):
+    """Разбирает один диапазон из заголовка Range.
+
+    Возвращает (начало, конец включительно), None, если заголовок не
+    поддерживается и нужно отдать файл целиком, или ValueError, если
+    диапазон за пределами файла.
+    """
+    match = RANGE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        # bytes=-500 — последние 500 байт.
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def iter_range(file, start, length):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def stat_file(root, path):
+    try:
+        full_path = safe_join(root, path)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404
+    if not S_ISREG(stat.st_mode):
+        raise Http404
+    return full_path, stat
+
+
+def offload_response(name, path):
+    response = HttpResponse()
+    if settings.MEDIA_OFFLOAD == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_OFFLOAD_PREFIX + quote(name))
+    else:
+        response['X-Sendfile'] = path
+    # Тип файла определит фронтенд-сервер.
+    del response['Content-Type']
+    return response
+
+
+def file_response(request, path, stat):
+    content_type = (
+        mimetypes.guess_type(path)[0] or 'application/octet-stream')
+    try:
+        byte_range = parse_range(
+            request.headers.get('Range', ''), stat.st_size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            iter_range(file, start, length), status=206,
+            content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = length
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """Отдаёт загруженные файлы, скрывая фото неопубликованных публикаций.
+
+    Сама передача файла по возможности отдаётся фронтенд-серверу
+    (MEDIA_OFFLOAD), чтобы не занимать рабочий процесс Django.
+    """
+    full_path, stat = stat_file(settings.MEDIA_ROOT, path)
+    visibility = get_visibility(path, request.user)
+    if visibility is None:
+        raise Http404
+
+    if not was_modified_since(
+            request.headers.get('If-Modified-Since'), stat.st_mtime,
+            stat.st_size):
+        response = HttpResponse(status=304)
+    elif settings.MEDIA_OFFLOAD:
+        response = offload_response(path, full_path)
+    else:
+        response = file_response(request, full_path, stat)
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = (
+        f'{visibility}, max-age={settings.MEDIA_MAX_AGE}')
+    return response
+
+
+def choose_encoding(path, header):
+    accepted = accepted_encodings(header)
+    for encoding, suffix in STATIC_ENCODINGS:
+        if encoding in accepted and os.path.exists(path + suffix):
+            return encoding, path + suffix
+    return None, path
+
+
+def accepted_encodings(header):
+    encodings = set()
+    for part in header.split(','):
+        encoding, _, params = part.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(encoding.strip().lower())
+    return encodings
+
+
+@require_safe
+def serve_static(request, path):
+    """Отдаёт собранную статику, когда перед Django нет фронтенд-сервера.
+
+    Выбирает заранее сжатую копию по Accept-Encoding, а файлам с хешем
+    в имени ставит Cache-Control: immutable на год.
+    """
+    if not settings.STATIC_SERVE or not settings.STATIC_ROOT:
+        raise Http404
+    full_path, stat = stat_file(settings.STATIC_ROOT, path)
+
+    if not was_modified_since(
+            request.headers.get('If-Modified-Since'), stat.st_mtime,
+            stat.st_size):
+        response = HttpResponse(status=304)
+    else:
+        content_type = (
+            mimetypes.guess_type(full_path)[0] or 'application/octet-stream')
+        encoding, served_path = choose_encoding(
+            full_path, request.headers.get('Accept-Encoding', ''))
+        response = FileResponse(
+            open(served_path, 'rb'), content_type=content_type)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['Vary'] = 'Accept-Encoding'
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if HASHED_NAME.search(path):
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = (
+            f'public, max-age={settings.STATIC_MAX_AGE}')
+    return response
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_auto_20261019_1134'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_error',
+            field=models.TextField(blank=True, editable=False, verbose_name='Ошибка обработки фото'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('', 'Нет фото'), ('pending', 'Обрабатывается'), ('ready', 'Готово'), ('failed', 'Ошибка обработки')], default='', editable=False, max_length=16, verbose_name='Обработка фото'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_auto_20261019_1136'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageMetadata',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='image_metadata', serialize=False, to='blog.post', verbose_name='Публикация')),
+                ('width', models.PositiveIntegerField(verbose_name='Ширина')),
+                ('height', models.PositiveIntegerField(verbose_name='Высота')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Размер в байтах')),
+                ('format', models.CharField(blank=True, max_length=16, verbose_name='Формат')),
+            ],
+            options={
+                'verbose_name': 'сведения о фото',
+                'verbose_name_plural': 'Сведения о фото',
+            },
+        ),
+    ]
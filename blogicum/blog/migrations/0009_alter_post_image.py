@@ -0,0 +1,19 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:43
+
+import blog.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_imagemetadata'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, upload_to=blog.images.post_image_upload_to, verbose_name='Фото'),
+        ),
+    ]
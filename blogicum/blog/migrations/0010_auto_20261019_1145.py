@@ -0,0 +1,43 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:45
+
+import blog.images
+import blog.storage
+from django.db import migrations, models
+
+
+def count_references(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    StoredImage = apps.get_model('blog', 'StoredImage')
+    references = Post.objects.exclude(image='').values('image').annotate(
+        refcount=models.Count('id'))
+    StoredImage.objects.bulk_create(
+        StoredImage(name=row['image'], refcount=row['refcount'])
+        for row in references.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_alter_post_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredImage',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Файл')),
+                ('refcount', models.PositiveIntegerField(default=0, verbose_name='Число публикаций')),
+            ],
+            options={
+                'verbose_name': 'файл фото',
+                'verbose_name_plural': 'Файлы фото',
+            },
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=blog.storage.ContentAddressedStorage(), upload_to=blog.images.post_image_upload_to, verbose_name='Фото'),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:08
+
+import blog.images
+import blog.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_auto_20261019_1145'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, db_index=True, storage=blog.storage.ContentAddressedStorage(), upload_to=blog.images.post_image_upload_to, verbose_name='Фото'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.shortcuts import redirect
 
@@ -10,3 +11,11 @@ class OnlyAuthorMixin(UserPassesTestMixin):
     def handle_no_permission(self):
         post_id = self.kwargs.get('post_id')
         return redirect('blog:post_detail', post_id)
+
+
+class TemplateEngineMixin:
+    """Отрисовывает страницу движком из настройки BLOG_TEMPLATE_ENGINE."""
+
+    @property
+    def template_engine(self):
+        return settings.BLOG_TEMPLATE_ENGINE
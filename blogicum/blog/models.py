@@ -1,6 +1,13 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth import get_user_model
 
+from .image_tasks import image_processor
+from .images import (
+    delete_variants, post_image_upload_to, read_metadata, variant_url)
+from .storage import post_image_storage
+from .url_prefixes import fast_reverse
+
 
 User = get_user_model()
 TITLE_MAX_LENGTH = 256
@@ -39,6 +46,9 @@ class Category(PublishedModel):
     def __str__(self):
         return self.title[:NAME_MAX_LENGTH]
 
+    def get_absolute_url(self):
+        return fast_reverse('blog:category_posts', self.slug)
+
 
 class Location(PublishedModel):
     name = models.CharField(max_length=TITLE_MAX_LENGTH,
@@ -53,6 +63,12 @@ class Location(PublishedModel):
 
 
 class Post(PublishedModel):
+    class ImageStatus(models.TextChoices):
+        NONE = '', 'Нет фото'
+        PENDING = 'pending', 'Обрабатывается'
+        READY = 'ready', 'Готово'
+        FAILED = 'failed', 'Ошибка обработки'
+
     title = models.CharField(max_length=TITLE_MAX_LENGTH,
                              verbose_name='Заголовок')
     text = models.TextField(verbose_name='Текст')
@@ -61,7 +77,16 @@ class Post(PublishedModel):
         help_text=('Если установить дату и время в будущем —'
                    ' можно делать отложенные публикации.')
     )
-    image = models.ImageField('Фото', upload_to='post_images', blank=True)
+    image = models.ImageField(
+        'Фото', upload_to=post_image_upload_to, storage=post_image_storage,
+        blank=True, db_index=True)
+    image_variants = models.JSONField(
+        'Уменьшенные копии фото', default=dict, blank=True, editable=False)
+    image_status = models.CharField(
+        'Обработка фото', max_length=16, choices=ImageStatus.choices,
+        default=ImageStatus.NONE, blank=True, editable=False)
+    image_error = models.TextField(
+        'Ошибка обработки фото', blank=True, editable=False)
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, verbose_name='Автор публикации',
         related_name='posts')
@@ -82,6 +107,189 @@ class Post(PublishedModel):
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date', )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # По имени фото на момент загрузки save() узнаёт, что фото заменили.
+        if 'image' in post.__dict__:
+            post._loaded_image = post.__dict__['image'] or ''
+        return post
+
+    def get_loaded_image(self):
+        if self._state.adding:
+            return ''
+        if '_loaded_image' in self.__dict__:
+            return self._loaded_image
+        return Post.objects.filter(pk=self.pk).values_list(
+            'image', flat=True).first() or ''
+
+    def save(self, *args, **kwargs):
+        old_image = self.get_loaded_image()
+        old_variants = self.image_variants
+        # После сохранения поле хранит только имя файла.
+        upload = None if self.image._committed else self.image.file
+        super().save(*args, **kwargs)
+        self._loaded_image = self.image.name or ''
+        # Повторно загруженное то же самое фото получает прежнее имя
+        # в хранилище, поэтому не обрабатывается заново.
+        if old_image == self._loaded_image:
+            return
+        using = kwargs.get('using')
+        missing = StoredImage.acquire(
+            self._loaded_image, self.image.storage, using=using)
+        if missing and upload is not None:
+            # Файл удалили, пока шла загрузка: записываем его заново.
+            upload.seek(0)
+            self.image.storage.save(self._loaded_image, upload)
+        StoredImage.release(
+            old_image, old_variants, self.image.storage, using=using)
+        self.refresh_image_variants(using=using)
+
+    def refresh_image_variants(self, using=None):
+        # Новые варианты готовятся в фоне после фиксации транзакции;
+        # до тех пор в шаблонах показывается заглушка. Если такое же фото
+        # уже обработано для другой публикации, её варианты общие.
+        self.refresh_image_metadata()
+        ready_variants = self.image and Post.objects.filter(
+            image=self.image.name, image_status=self.ImageStatus.READY
+        ).exclude(pk=self.pk).values_list('image_variants', flat=True).first()
+        self.image_variants = ready_variants or {}
+        self.image_error = ''
+        if ready_variants:
+            self.image_status = self.ImageStatus.READY
+        elif self.image:
+            self.image_status = self.ImageStatus.PENDING
+        else:
+            self.image_status = self.ImageStatus.NONE
+        Post.objects.filter(pk=self.pk).update(
+            image_variants=self.image_variants,
+            image_status=self.image_status,
+            image_error=self.image_error,
+        )
+        if self.image_pending:
+            image_processor.schedule(self.pk, using=using)
+
+    def refresh_image_metadata(self):
+        metadata = read_metadata(self.image)
+        if metadata is None:
+            ImageMetadata.objects.filter(post=self).delete()
+            self._state.fields_cache.pop('image_metadata', None)
+            return None
+        self.image_metadata, _ = ImageMetadata.objects.update_or_create(
+            post=self, defaults=metadata)
+        return self.image_metadata
+
+    @property
+    def image_dimensions(self):
+        try:
+            return self.image_metadata.width, self.image_metadata.height
+        except ImageMetadata.DoesNotExist:
+            return None, None
+
+    @property
+    def image_pending(self):
+        return self.image_status == self.ImageStatus.PENDING
+
+    @property
+    def card_image_url(self):
+        return variant_url(self.image, self.image_variants, 'card')
+
+    @property
+    def detail_image_url(self):
+        return variant_url(self.image, self.image_variants, 'detail')
+
+    def get_absolute_url(self):
+        return fast_reverse('blog:post_detail', self.pk)
+
+    def get_edit_url(self):
+        return fast_reverse('blog:edit_post', self.pk)
+
+    def get_delete_url(self):
+        return fast_reverse('blog:delete_post', self.pk)
+
+    def get_comment_url(self):
+        return fast_reverse('blog:add_comment', self.pk)
+
+
+class ImageMetadata(models.Model):
+    # Отдельная таблица, а не поля Post: сведения нужны только при выводе
+    # фото и заполняются при загрузке, чтобы не открывать файл в шаблонах.
+    post = models.OneToOneField(
+        Post, on_delete=models.CASCADE, primary_key=True,
+        related_name='image_metadata', verbose_name='Публикация')
+    width = models.PositiveIntegerField('Ширина')
+    height = models.PositiveIntegerField('Высота')
+    size = models.PositiveBigIntegerField('Размер в байтах')
+    format = models.CharField('Формат', max_length=16, blank=True)
+
+    class Meta:
+        verbose_name = 'сведения о фото'
+        verbose_name_plural = 'Сведения о фото'
+
+    def __str__(self):
+        return f'{self.width}×{self.height} {self.format}'
+
+
+class StoredImage(models.Model):
+    # Одинаковые фото хранятся одним файлом; файл и его варианты удаляются,
+    # когда на него не остаётся ссылок. Запись с refcount=0 означает, что
+    # удаление файлов ждёт фиксации транзакции.
+    name = models.CharField('Файл', max_length=100, primary_key=True)
+    refcount = models.PositiveIntegerField('Число публикаций', default=0)
+
+    class Meta:
+        verbose_name = 'файл фото'
+        verbose_name_plural = 'Файлы фото'
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def acquire(cls, name, storage, using=None):
+        """Добавляет ссылку; True, если файл нужно записать заново.
+
+        Файл мог удалить обработчик release(), пока фото загружалось:
+        тогда загрузка нашла старый файл и не стала его записывать.
+        """
+        if not name:
+            return False
+        manager = cls.objects.db_manager(using)
+        # UPDATE ждёт, пока delete_stored_files() держит блокировку записи.
+        if not manager.filter(name=name).update(refcount=F('refcount') + 1):
+            _, created = manager.get_or_create(
+                name=name, defaults={'refcount': 1})
+            if not created:
+                manager.filter(name=name).update(refcount=F('refcount') + 1)
+        return not storage.exists(name)
+
+    @classmethod
+    def release(cls, name, variants, storage, using=None):
+        if not name:
+            return
+        manager = cls.objects.db_manager(using)
+        manager.filter(name=name, refcount__gt=0).update(
+            refcount=F('refcount') - 1)
+        if not manager.filter(name=name, refcount=0).exists():
+            return
+        if variants.get('source') != name:
+            variants = {}
+        transaction.on_commit(
+            lambda: cls.delete_stored_files(name, variants, storage, using),
+            using=using)
+
+    @classmethod
+    def delete_stored_files(cls, name, variants, storage, using=None):
+        # Файлы удаляются под блокировкой записи и только если за это
+        # время фото никто не загрузил снова.
+        with transaction.atomic(using=using):
+            stored = cls.objects.db_manager(using).select_for_update(
+            ).filter(name=name, refcount=0)
+            if not stored.exists():
+                return
+            storage.delete(name)
+            delete_variants(storage, variants)
+            stored.delete()
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -110,3 +318,13 @@ class Comment(models.Model):
         return ('Комментарий от '
                 f'{author} к посту {title}. '
                 f'Текст комментария: {text}')
+
+    def get_absolute_url(self):
+        return (fast_reverse('blog:post_detail', self.post_id)
+                + f'#comment_{self.pk}')
+
+    def get_edit_url(self):
+        return fast_reverse('blog:edit_comment', self.post_id, self.pk)
+
+    def get_delete_url(self):
+        return fast_reverse('blog:delete_comment', self.post_id, self.pk)
@@ -0,0 +1,29 @@
+"""Кеш промахов: публикаций, авторов и категорий, которых нет.
+
+Боты перебирают /posts/<id>/ и /profile/<имя>/; каждый такой адрес —
+запрос к базе и ответ 404. При NEGATIVE_CACHE_ENABLED промах
+запоминается на NEGATIVE_CACHE_TIMEOUT секунд, и повторный запрос
+того же адреса получает 404 без обращения к базе. Ключи содержат номер
+поколения лент, поэтому любое изменение публикаций, категорий или
+пользователей сбрасывает все промахи сразу. Отложенная публикация
+становится видна не позже чем через NEGATIVE_CACHE_TIMEOUT секунд.
+"""
+from django.conf import settings
+from django.http import Http404
+
+from .caching import get_cache, make_key
+
+
+def lookup(kind, value, getter):
+    """Результат getter() или Http404, если объект недавно не нашёлся."""
+    if not settings.NEGATIVE_CACHE_ENABLED:
+        return getter()
+    cache = get_cache()
+    key = make_key('missing', kind, value)
+    if cache.get(key):
+        raise Http404(f'{kind} {value}: нет (закешированный промах)')
+    try:
+        return getter()
+    except Http404:
+        cache.set(key, True, settings.NEGATIVE_CACHE_TIMEOUT)
+        raise
@@ -0,0 +1,138 @@
+import json
+
+from django.conf import settings
+from django.core.paginator import (
+    EmptyPage, Page, PageNotAnInteger, Paginator)
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+def page_window(number, last, on_each_side=2, on_ends=1, tail=True):
+    """Номера страниц для навигации; None обозначает пропуск.
+
+    page_window(50, 100) -> [1, None, 48, 49, 50, 51, 52, None, 100].
+    Размер списка не зависит от числа страниц. С tail=False конец не
+    показывается — так делается, когда число страниц известно лишь
+    приблизительно.
+    """
+    pages = set(range(1, min(on_ends, last) + 1))
+    pages.update(range(
+        max(number - on_each_side, 1), min(number + on_each_side, last) + 1))
+    if tail:
+        pages.update(range(max(last - on_ends + 1, 1), last + 1))
+    window = []
+    previous = 0
+    for page in sorted(pages):
+        # Пропуск ровно одной страницы не экономит места.
+        if page - previous == 2:
+            window.append(previous + 1)
+        elif page - previous > 2:
+            window.append(None)
+        window.append(page)
+        previous = page
+    if not tail and previous < last:
+        window.append(None)
+    return window
+
+
+class ElidedPage(Page):
+    # Есть ли следующая страница, когда число записей оценено
+    # приблизительно; иначе None.
+    has_more = None
+
+    def has_next(self):
+        if self.has_more is not None:
+            return self.has_more
+        return super().has_next()
+
+    def next_page_number(self):
+        if self.has_more is None:
+            return super().next_page_number()
+        if not self.has_more:
+            raise EmptyPage('Следующей страницы нет')
+        return self.number + 1
+
+    @cached_property
+    def page_window(self):
+        paginator = self.paginator
+        last = paginator.num_pages
+        if self.has_more is False:
+            last = self.number
+        elif self.has_more:
+            # Оценка могла оказаться меньше настоящего числа записей.
+            last = max(last, self.number + 1)
+        return page_window(
+            self.number, last,
+            on_each_side=settings.PAGINATION_ON_EACH_SIDE,
+            on_ends=settings.PAGINATION_ON_ENDS,
+            tail=not paginator.count_is_estimate,
+        )
+
+
+class ElidedPaginator(Paginator):
+    """Постраничный вывод с окном номеров вокруг текущей страницы.
+
+    Если планировщик БД оценивает выборку больше, чем в
+    PAGINATION_EXACT_COUNT_LIMIT записей, точный COUNT(*) не выполняется:
+    число страниц берётся из оценки, а наличие следующей страницы
+    проверяется выборкой одной лишней записи.
+    """
+
+    count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        limit = settings.PAGINATION_EXACT_COUNT_LIMIT
+        if limit is not None:
+            estimate = self.estimate_count()
+            if estimate is not None and estimate > limit:
+                self.count_is_estimate = True
+                return estimate
+        return super().count
+
+    def estimate_count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return None
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def validate_number(self, number):
+        if not self.count or not self.count_is_estimate:
+            return super().validate_number(number)
+        # Оценка бывает и больше, и меньше настоящего числа записей:
+        # сверху номер ограничивает только то, есть ли на странице
+        # записи (см. page()).
+        if isinstance(number, float) and not number.is_integer():
+            raise PageNotAnInteger('Номер страницы должен быть целым')
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть целым')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.count_is_estimate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('На этой странице нет записей')
+        page = self._get_page(rows[:self.per_page], number, self)
+        page.has_more = len(rows) > self.per_page
+        return page
+
+    def _get_page(self, *args, **kwargs):
+        return ElidedPage(*args, **kwargs)
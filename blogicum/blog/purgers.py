@@ -0,0 +1,57 @@
+import logging
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class BasePurger:
+    def purge(self, keys):
+        raise NotImplementedError(
+            'subclasses of BasePurger must provide a purge() method')
+
+
+class LogPurger(BasePurger):
+    """Пишет ключи в журнал и, если задан SURROGATE_PURGE_LOG, в файл."""
+
+    def purge(self, keys):
+        for key in keys:
+            logger.info('PURGE %s', key)
+        path = settings.SURROGATE_PURGE_LOG
+        if path:
+            with open(path, 'a', encoding='utf-8') as log:
+                log.writelines(f'{key}\n' for key in keys)
+
+
+class HttpPurger(BasePurger):
+    """Сбрасывает ключи запросом PURGE (Varnish с xkey, Fastly).
+
+    Ключи передаются через пробел в одном заголовке, до
+    MAX_KEYS_PER_REQUEST за запрос: массовое снятие с публикации в
+    админке не ждёт по запросу на каждый ключ.
+    """
+
+    MAX_KEYS_PER_REQUEST = 256
+
+    def purge(self, keys):
+        keys = list(keys)
+        for start in range(0, len(keys), self.MAX_KEYS_PER_REQUEST):
+            batch = ' '.join(keys[start:start + self.MAX_KEYS_PER_REQUEST])
+            request = urllib.request.Request(
+                settings.SURROGATE_PURGE_URL,
+                method='PURGE',
+                headers={'Surrogate-Key': batch},
+            )
+            try:
+                with urllib.request.urlopen(
+                        request, timeout=settings.SURROGATE_PURGE_TIMEOUT):
+                    pass
+            except (urllib.error.URLError, OSError):
+                logger.exception('Не удалось сбросить ключи %s', batch)
+
+
+def get_purger():
+    return import_string(settings.SURROGATE_PURGER)()
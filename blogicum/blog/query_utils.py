@@ -8,7 +8,8 @@ def get_optimized_post_queryset(manager=Post.objects,
                                 apply_filters=True,
                                 apply_annotation=True,
                                 user=None):
-    queryset = manager.select_related('author', 'category', 'location')
+    queryset = manager.select_related(
+        'author', 'category', 'location', 'image_metadata')
 
     if apply_filters:
         if user is not None:
@@ -24,7 +25,9 @@ def get_optimized_post_queryset(manager=Post.objects,
             )
 
     if apply_annotation:
+        # id различает публикации с одинаковой датой, чтобы порядок был
+        # однозначным для курсора подгрузки ленты (см. fragments.py).
         queryset = queryset.annotate(
-            comment_count=Count('comments')).order_by('-pub_date')
+            comment_count=Count('comments')).order_by('-pub_date', '-pk')
 
     return queryset
@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .caching import bump_generation
+from .models import Category, Comment, Location, Post, StoredImage
+from .surrogate import post_keys, purge_batcher
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+@receiver(post_delete, sender=User)
+def invalidate_feed_cache(sender, **kwargs):
+    bump_generation()
+
+
+@receiver(post_save, sender=User)
+def invalidate_feed_cache_on_user_change(sender, update_fields=None,
+                                         **kwargs):
+    # При каждом входе Django сохраняет last_login — ленты от этого
+    # не меняются.
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    bump_generation()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_post(sender, instance, using, raw=False, **kwargs):
+    # При загрузке фикстур связанные объекты могут ещё не существовать.
+    if raw:
+        return
+    purge_batcher.add(post_keys(instance) | {'index'}, using=using)
+
+
+@receiver(post_delete, sender=Post)
+def release_post_image(sender, instance, using, **kwargs):
+    StoredImage.release(
+        instance.image.name, instance.image_variants, instance.image.storage,
+        using=using)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment(sender, instance, using, **kwargs):
+    purge_batcher.add({f'post-{instance.post_id}'}, using=using)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def purge_category(sender, instance, using, **kwargs):
+    purge_batcher.add({f'category-{instance.slug}'}, using=using)
+
+
+@receiver(pre_save, sender=Category)
+def purge_renamed_category(sender, instance, using, raw=False, **kwargs):
+    # Страницы со старым адресом помечены старым ключом.
+    if raw or instance.pk is None:
+        return
+    old_slug = Category.objects.using(using).filter(
+        pk=instance.pk).values_list('slug', flat=True).first()
+    if old_slug is not None and old_slug != instance.slug:
+        purge_batcher.add({f'category-{old_slug}'}, using=using)
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def purge_location(sender, instance, using, **kwargs):
+    purge_batcher.add({f'location-{instance.pk}'}, using=using)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def purge_author(sender, instance, using, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    purge_batcher.add({f'author-{instance.username}'}, using=using)
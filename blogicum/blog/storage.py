@@ -0,0 +1,122 @@
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:  # brotli — необязательная зависимость
+    brotli = None
+
+from .images import SHARDED_NAME, UPLOAD_DIR, shard_name
+
+# Оригинал загруженного фото; у вариантов после расширения оригинала
+# идут ещё суффиксы: <hash>.jpg.card.jpg
+UPLOAD_NAME = re.compile(SHARDED_NAME.pattern + r'[^./]+$')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит загруженные фото под хешем содержимого.
+
+    Одинаковые файлы сохраняются один раз: хеш считается во время записи
+    во временный файл, и если файл с таким хешем уже есть, временный
+    просто удаляется. Варианты фото перезаписываются на месте атомарно:
+    одно фото могут обрабатывать одновременно, и файлы у них одинаковые.
+    """
+
+    def is_variant(self, name):
+        return bool(SHARDED_NAME.match(name)) and not UPLOAD_NAME.match(name)
+
+    def get_available_name(self, name, max_length=None):
+        if self.is_variant(name):
+            return name
+        return super().get_available_name(name, max_length)
+
+    def _save(self, name, content):
+        if self.is_variant(name):
+            return self._replace(name, content)
+        if not UPLOAD_NAME.match(name):
+            return super()._save(name, content)
+        directory = self.path(UPLOAD_DIR)
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.upload')
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+            name = shard_name(digest.hexdigest(), name)
+            path = self.path(name)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(path, self.file_permissions_mode)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return name
+
+    def _replace(self, name, content):
+        # Читатель видит либо прежний файл, либо новый целиком.
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), suffix='.variant')
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in content.chunks():
+                    temp.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return name
+
+
+post_image_storage = ContentAddressedStorage()
+
+# Хешированное имя статики: bootstrap.min.3f2a9c1d4e5b.css
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.json', '.txt', '.map')
+
+
+def compress_static(path, min_size=256):
+    """Пишет рядом с файлом .gz и .br, если они заметно меньше оригинала.
+
+    Возвращает словарь {кодировка: размер}.
+    """
+    with open(path, 'rb') as source:
+        data = source.read()
+    sizes = {}
+    if len(data) < min_size:
+        return sizes
+    encoders = [('gzip', '.gz', lambda raw: gzip.compress(raw, 9, mtime=0))]
+    if brotli is not None:
+        encoders.append(('br', '.br', brotli.compress))
+    for encoding, suffix, compress in encoders:
+        compressed = compress(data)
+        if len(compressed) < len(data) * 0.95:
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
+            sizes[encoding] = len(compressed)
+    return sizes
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем в имени и заранее сжатыми копиями .gz и .br."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for hashed_name in set(self.hashed_files.values()):
+            if hashed_name.endswith(COMPRESSIBLE):
+                compress_static(self.path(hashed_name))
@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.template.backends.django import Template as DjangoTemplate
+from django.template.context import make_context
+from django.template.loader import get_template, select_template
+from django.utils.safestring import mark_safe
+
+# Место для карточек в каркасе страницы.
+POST_STREAM = mark_safe('<!-- post-stream -->')
+
+
+def render_each(template, context, request, posts):
+    """Отрисовывает шаблон карточки для каждой публикации по очереди.
+
+    Шаблону Django контекст с данными контекст-процессоров готовится один
+    раз, и подключаемые шаблоны загружаются один раз на все карточки —
+    как при выводе их циклом {% for %} внутри страницы.
+    """
+    if not isinstance(template, DjangoTemplate):
+        for post in posts:
+            yield template.render(dict(context, post=post), request)
+        return
+    template = template.template
+    context = make_context(context, request)
+    with context.render_context.push_state(template), \
+            context.bind_template(template):
+        for post in posts:
+            with context.push(post=post):
+                yield template._render(context)
+
+
+class StreamingFeedMixin:
+    """Отдаёт ленту потоком при FEED_STREAMING.
+
+    Каркас страницы (<head> со ссылкой на стили, шапка, навигация по
+    страницам, подвал) отрисовывается сразу, пока ответ ещё проходит через
+    middleware, — так сессия, CSRF и пользователь используются как обычно.
+    Карточки публикаций дорисовываются уже при отправке ответа.
+    Страницы из кеша лент отдаются целиком.
+    """
+
+    post_template_name = 'includes/post_article.html'
+
+    def streaming_applies(self):
+        request = self.request
+        return (
+            settings.FEED_STREAMING
+            and not self.page_cache_applies(request)
+            and not self.hole_punching_applies(request)
+        )
+
+    def render_to_response(self, context, **response_kwargs):
+        if not self.streaming_applies():
+            return super().render_to_response(context, **response_kwargs)
+        template = select_template(
+            self.get_template_names(), using=self.template_engine)
+        head, tail = template.render(
+            dict(context, post_stream=POST_STREAM), self.request
+        ).split(POST_STREAM, 1)
+        response = StreamingHttpResponse(
+            self.stream_posts(head, context, tail), **response_kwargs)
+        # Иначе nginx соберёт ответ целиком, прежде чем отдать клиенту.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def stream_posts(self, head, context, tail):
+        yield head
+        template = get_template(
+            self.post_template_name, using=self.template_engine)
+        yield from render_each(
+            template, context, self.request, context['page_obj'])
+        yield tail
@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.db import transaction
+
+from .purgers import get_purger
+
+
+def post_keys(post):
+    keys = {f'post-{post.pk}', f'author-{post.author.username}'}
+    if post.category_id:
+        keys.add(f'category-{post.category.slug}')
+    if post.location_id:
+        keys.add(f'location-{post.location_id}')
+    return keys
+
+
+class PendingPurge:
+    """Ключи одного блока atomic; сбрасываются при фиксации транзакции."""
+
+    def __init__(self, using=None):
+        self.using = using
+        self.keys = set()
+
+    def __call__(self):
+        # Обработчики остальных блоков транзакции, которые не
+        # откатились, ещё ждут своей очереди: их ключи сбрасываются
+        # вместе с этими, чтобы каждый ключ ушёл один раз.
+        keys, self.keys = self.keys, set()
+        waiting = transaction.get_connection(self.using).run_on_commit
+        # Обычно этот обработчик уже снят с очереди; в тестах
+        # (captureOnCommitCallbacks) очередь не очищается.
+        start = next((
+            index + 1 for index, (sids, func) in enumerate(waiting)
+            if func is self), 0)
+        for sids, func in waiting[start:]:
+            if isinstance(func, PendingPurge):
+                keys |= func.keys
+                func.keys = set()
+        if keys:
+            get_purger().purge(sorted(keys))
+
+
+class PurgeBatcher:
+    """Собирает ключи за транзакцию и сбрасывает каждый ровно один раз.
+
+    Ключи хранятся в самом обработчике on_commit своего блока atomic:
+    чужие транзакции и потоки их не видят, а при откате блока они
+    исчезают вместе с обработчиком. При фиксации первый обработчик
+    забирает ключи всех оставшихся блоков транзакции.
+    """
+
+    def add(self, keys, using=None):
+        connection = transaction.get_connection(using)
+        if not connection.in_atomic_block:
+            get_purger().purge(sorted(keys))
+            return
+        block = set(connection.savepoint_ids)
+        for sids, func in connection.run_on_commit:
+            if sids == block and isinstance(func, PendingPurge):
+                func.keys.update(keys)
+                return
+        pending = PendingPurge(connection.alias)
+        pending.keys.update(keys)
+        connection.on_commit(pending)
+
+
+purge_batcher = PurgeBatcher()
+
+
+class SurrogateKeyMixin:
+    """Помечает ответ ключами для кеширующего прокси."""
+
+    surrogate_keys = ()
+
+    def get_surrogate_keys(self, context):
+        keys = set(self.surrogate_keys)
+        page_obj = context.get('page_obj')
+        posts = page_obj if page_obj is not None else [context.get('post')]
+        for post in posts:
+            if post is not None:
+                keys |= post_keys(post)
+        return keys
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        response['Surrogate-Key'] = ' '.join(
+            sorted(self.get_surrogate_keys(context)))
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if (settings.SURROGATE_MAX_AGE and response.has_header('Surrogate-Key')
+                and not request.user.is_authenticated):
+            response['Surrogate-Control'] = (
+                f'max-age={settings.SURROGATE_MAX_AGE}')
+        return response
@@ -0,0 +1,175 @@
+"""Время отрисовки шаблонов и тегов за запрос.
+
+Включается настройкой TEMPLATE_PROFILING: тогда при запуске
+Template._render и узлы simple_tag/inclusion_tag оборачиваются замером
+времени. Без неё ничего не подменяется, и накладных расходов нет.
+Учитываются только шаблоны Django; карточки, которые дорисовываются
+уже при потоковой отдаче (FEED_STREAMING), в отчёт запроса не попадают.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.base import Template
+from django.template.library import InclusionNode, SimpleNode
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('template_profile', default=None)
+_installed = False
+
+
+class RenderProfile:
+    """Число вызовов, полное и собственное время по именам шаблонов.
+
+    Собственное время — полное за вычетом вложенных шаблонов и тегов.
+    """
+
+    def __init__(self):
+        self.stats = defaultdict(lambda: [0, 0.0, 0.0])
+        self._names = []
+        self._children = []
+
+    def measure(self, name, func, *args):
+        # Шаблон внутри самого себя (рекурсивный include) не должен
+        # посчитаться в полном времени дважды.
+        nested = name in self._names
+        self._names.append(name)
+        self._children.append(0.0)
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._names.pop()
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            stat = self.stats[name]
+            stat[0] += 1
+            if not nested:
+                stat[1] += elapsed
+            stat[2] += elapsed - children
+
+    @property
+    def total(self):
+        return sum(stat[2] for stat in self.stats.values())
+
+    def top(self, limit=None):
+        """[(имя, вызовы, полное, собственное)] по убыванию собственного."""
+        rows = sorted(
+            ((name, *stat) for name, stat in self.stats.items()),
+            key=lambda row: row[3], reverse=True)
+        return rows[:limit]
+
+
+def _wrap(name_of, render):
+    @wraps(render)
+    def profiled(self, context):
+        profile = _current.get()
+        if profile is None:
+            return render(self, context)
+        return profile.measure(name_of(self), render, self, context)
+    return profiled
+
+
+def install():
+    """Оборачивает отрисовку шаблонов замером времени; повторно — ничего."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    Template._render = _wrap(
+        lambda template: template.origin.template_name or '<string>',
+        Template._render)
+    for node_class in (SimpleNode, InclusionNode):
+        node_class.render = _wrap(
+            lambda node: f'{{% {node.func.__name__} %}}', node_class.render)
+
+
+@contextmanager
+def profile_render():
+    profile = RenderProfile()
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+class ProfileStats:
+    """Сводка по всем запросам процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._stats = defaultdict(lambda: [0, 0.0, 0.0])
+
+    def record(self, profile):
+        with self._lock:
+            self._requests += 1
+            for name, values in profile.stats.items():
+                stat = self._stats[name]
+                for index, value in enumerate(values):
+                    stat[index] += value
+
+    def report(self):
+        with self._lock:
+            return self._requests, {
+                name: list(stat) for name, stat in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._requests = 0
+            self._stats.clear()
+
+
+profile_stats = ProfileStats()
+
+
+def server_timing(profile, limit):
+    # Chrome и Firefox показывают Server-Timing на вкладке Network.
+    # Значения заголовков — только ASCII.
+    entries = [f'tpl;desc="total";dur={profile.total * 1000:.1f}']
+    for index, (name, calls, _, own) in enumerate(profile.top(limit)):
+        description = name.encode('ascii', 'replace').decode().replace(
+            '"', "'").replace('\\', '/')
+        entries.append(
+            f'tpl{index};desc="{description} x{calls}";dur={own * 1000:.1f}')
+    return ', '.join(entries)
+
+
+class TemplateProfilerMiddleware:
+    """Замеряет шаблоны каждого запроса при TEMPLATE_PROFILING.
+
+    Итог попадает в заголовок Server-Timing, в журнал и в profile_stats.
+    Заголовок раскрывает имена шаблонов, поэтому профилирование
+    не предназначено для боевого окружения.
+    """
+
+    def __init__(self, get_response):
+        if not settings.TEMPLATE_PROFILING:
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with profile_render() as profile:
+            response = self.get_response(request)
+        if not profile.stats:
+            return response
+        profile_stats.record(profile)
+        response['Server-Timing'] = server_timing(
+            profile, settings.TEMPLATE_PROFILING_HEADER_LIMIT)
+        logger.info(
+            '%s %s: шаблоны %.1f мс; %s', request.method, request.path,
+            profile.total * 1000, '; '.join(
+                f'{name} ×{calls} {own * 1000:.1f}/{cumulative * 1000:.1f}'
+                for name, calls, cumulative, own in profile.top(5)))
+        return response
@@ -0,0 +1,30 @@
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def read_css(name):
+    path = finders.find(name)
+    if path is None:
+        raise template.TemplateSyntaxError(f'Нет файла стилей {name}.')
+    with open(path, encoding='utf-8') as css_file:
+        # Закрывающий тег внутри стилей завершил бы <style> раньше времени.
+        return css_file.read().replace('</', '<\\/')
+
+
+@register.simple_tag
+def stylesheet():
+    """Подключает стили ссылкой или встраивает их в страницу."""
+    if settings.CSS_INLINE:
+        return format_html('<style>{}</style>', mark_safe(
+            read_css(settings.CSS_FILE)))
+    return format_html(
+        '<link rel="stylesheet" href="{}">', static(settings.CSS_FILE))
@@ -0,0 +1,101 @@
+from django import template
+from django.conf import settings
+from django.template.base import token_kwargs
+
+from blog.caching import MISS, STALE, feed_cache, make_key
+from blog.holes import is_skeleton_render, make_marker
+
+register = template.Library()
+
+
+class SWRCacheNode(template.Node):
+    def __init__(self, nodelist, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        if not settings.FEED_CACHE_ENABLED:
+            return self.nodelist.render(context)
+
+        key = make_key(
+            f'fragment:{self.fragment_name}',
+            *(var.resolve(context) for var in self.vary_on)
+        )
+        value, state = feed_cache.lookup(key)
+        if state == MISS:
+            value = self.nodelist.render(context)
+            feed_cache.set(key, value)
+        elif state == STALE:
+            # Контекст меняется дальше по ходу отрисовки страницы, а
+            # copy(context) делит с ним словари — {% for %} успел бы
+            # подменить переменную цикла. Фоновая перерисовка получает
+            # значения, снятые сейчас.
+            snapshot = context.new(context.flatten())
+            feed_cache.revalidate(
+                key, lambda: self.nodelist.render(snapshot))
+        return value
+
+
+@register.tag('swrcache')
+def do_swrcache(parser, token):
+    """
+    Кеширует фрагмент шаблона с отдачей устаревшей версии на время
+    фонового обновления::
+
+        {% swrcache 'post_card' post.id post.comment_count %}
+            ...
+        {% endswrcache %}
+    """
+    nodelist = parser.parse(('endswrcache',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least 1 argument.")
+    return SWRCacheNode(
+        nodelist,
+        bits[1].strip('\'"'),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
+
+
+class HoleNode(template.Node):
+    def __init__(self, nodelist, name, kwargs):
+        self.nodelist = nodelist
+        self.name = name
+        self.kwargs = kwargs
+
+    def render(self, context):
+        args = {
+            key: value.resolve(context) for key, value in self.kwargs.items()
+        }
+        if is_skeleton_render(context):
+            return make_marker(self.origin.template_name, self.name, args)
+        with context.push(args):
+            return self.nodelist.render(context)
+
+
+@register.tag('hole')
+def do_hole(parser, token):
+    """
+    Отмечает персональную часть страницы. В кешируемом каркасе вместо неё
+    остаётся метка, которая заполняется при каждом ответе. Внутри блока
+    доступны только переданные аргументы и данные контекст-процессоров
+    (``user``, ``csrf_token``, ...)::
+
+        {% hole 'post_actions' post_id=post.id author_id=post.author_id %}
+            ...
+        {% endhole %}
+    """
+    nodelist = parser.parse(('endhole',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least 1 argument.")
+    kwargs = token_kwargs(bits[2:], parser, support_legacy=False)
+    if len(kwargs) != len(bits) - 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag accepts only keyword arguments.")
+    return HoleNode(nodelist, bits[1].strip('\'"'), kwargs)
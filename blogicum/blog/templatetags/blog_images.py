@@ -0,0 +1,28 @@
+from django import template
+
+from blog.images import (
+    VARIANT_SIZES, scaled_size, srcset, variant_url, variants_match)
+
+register = template.Library()
+
+# Карточка и страница публикации выводят фото в колонке шириной 40rem.
+SIZES = '(max-width: 40rem) 100vw, 40rem'
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, variant):
+    """Выводит фото публикации с адаптивными копиями в форматах WebP/AVIF."""
+    if post.image_pending:
+        return {'pending': True}
+    # Размеры берутся из базы, чтобы браузер зарезервировал место под фото
+    # до его загрузки, а сервер не открывал файл при каждом выводе.
+    width, height = post.image_dimensions
+    if variants_match(post.image, post.image_variants):
+        width, height = scaled_size(width, height, VARIANT_SIZES[variant])
+    return {
+        'src': variant_url(post.image, post.image_variants, variant),
+        'sources': srcset(post.image, post.image_variants),
+        'sizes': SIZES,
+        'width': width,
+        'height': height,
+    }
@@ -0,0 +1,11 @@
+from django import template
+
+from blog.url_prefixes import fast_reverse
+
+register = template.Library()
+
+
+@register.simple_tag
+def fast_url(viewname, *args):
+    """Как {% url %} с позиционными аргументами, но без обхода резолвера."""
+    return fast_reverse(viewname, *args)
@@ -6,8 +6,11 @@ app_name = 'blog'
 
 urlpatterns = [
     path('', views.IndexView.as_view(), name='index'),
+    path('more/', views.IndexFragmentView.as_view(), name='index_more'),
     path('category/<slug:category_slug>/',
          views.CategoryPostView.as_view(), name='category_posts'),
+    path('category/<slug:category_slug>/more/',
+         views.CategoryFragmentView.as_view(), name='category_more'),
     path('posts/<int:post_id>/', views.PostDetailView.as_view(),
          name='post_detail'),
     path('posts/<int:post_id>/edit/',
@@ -24,6 +27,8 @@ urlpatterns = [
     path('profile/edit/', views.EditProfileView.as_view(),
          name='edit_profile'),
     path('profile/<username>/', views.ProfileView.as_view(), name='profile'),
+    path('profile/<username>/more/',
+         views.ProfileFragmentView.as_view(), name='profile_more'),
 
 
 ]
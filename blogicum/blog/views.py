@@ -1,3 +1,5 @@
+from functools import partial
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
@@ -7,20 +9,33 @@ from django.views.generic import (
     CreateView, DetailView, ListView, UpdateView
 )
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 
+from . import negative_cache
+from .caching import CachedPageMixin
+from .compression import breach_sensitive
 from .models import Post, Category, Comment
-from .mixins import OnlyAuthorMixin
+from .mixins import OnlyAuthorMixin, TemplateEngineMixin
+from .pagination import ElidedPaginator
 from .forms import PostForm, UserProfileForm, CommentForm
+from .fragments import FeedFragmentMixin, FeedFragmentView
 from .query_utils import get_optimized_post_queryset
+from .streaming import StreamingFeedMixin
+from .surrogate import SurrogateKeyMixin
 
 User = get_user_model()
 MAX_POSTS = settings.MAX_POSTS
 
 
-class IndexView(ListView):
+class IndexView(
+        SurrogateKeyMixin, CachedPageMixin, StreamingFeedMixin,
+        FeedFragmentMixin, TemplateEngineMixin, ListView):
     template_name = 'blog/index.html'
     context_object_name = 'post_list'
     paginate_by = MAX_POSTS
+    paginator_class = ElidedPaginator
+    fragment_url_name = 'blog:index_more'
+    surrogate_keys = ('index',)
 
     def get_queryset(self):
         return get_optimized_post_queryset(
@@ -29,7 +44,8 @@ class IndexView(ListView):
         )
 
 
-class PostDetailView(DetailView):
+class PostDetailView(
+        SurrogateKeyMixin, CachedPageMixin, TemplateEngineMixin, DetailView):
     model = Post
     template_name = 'blog/detail.html'
     pk_url_kwarg = 'post_id'
@@ -44,6 +60,15 @@ class PostDetailView(DetailView):
             user=user  # Передаем пользователя только если он авторизован
         )
 
+    def get_object(self, queryset=None):
+        # Автор видит свои скрытые публикации: промахи запоминаются
+        # только для анонимных читателей.
+        if self.request.user.is_authenticated:
+            return super().get_object(queryset)
+        return negative_cache.lookup(
+            'post', self.kwargs['post_id'],
+            partial(super().get_object, queryset))
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
@@ -51,18 +76,27 @@ class PostDetailView(DetailView):
             'author').all()
         return context
 
+    def get_hole_context(self):
+        return {'form': CommentForm()}
 
-class CategoryPostView(ListView):
+
+class CategoryPostView(
+        SurrogateKeyMixin, CachedPageMixin, StreamingFeedMixin,
+        FeedFragmentMixin, TemplateEngineMixin, ListView):
     template_name = 'blog/category.html'
     context_object_name = 'post_list'
     paginate_by = MAX_POSTS
+    paginator_class = ElidedPaginator
+    fragment_url_name = 'blog:category_more'
 
     def get_category(self):
-        return get_object_or_404(
-            Category,
-            slug=self.kwargs['category_slug'],
-            is_published=True
-        )
+        return negative_cache.lookup(
+            'category', self.kwargs['category_slug'], partial(
+                get_object_or_404,
+                Category,
+                slug=self.kwargs['category_slug'],
+                is_published=True
+            ))
 
     def get_queryset(self):
         category = CategoryPostView.get_category(self)
@@ -77,7 +111,15 @@ class CategoryPostView(ListView):
         context['category'] = self.get_category()
         return context
 
+    def get_surrogate_keys(self, context):
+        return super().get_surrogate_keys(context) | {
+            f'category-{context["category"].slug}'}
+
+    def get_fragment_url_args(self):
+        return (self.kwargs['category_slug'],)
 
+
+@method_decorator(breach_sensitive, name='dispatch')
 class PostCreateView(LoginRequiredMixin, CreateView):
     model = Post
     template_name = 'blog/create.html'
@@ -92,6 +134,7 @@ class PostCreateView(LoginRequiredMixin, CreateView):
                        kwargs={'username': self.request.user.username})
 
 
+@method_decorator(breach_sensitive, name='dispatch')
 class PostUpdateView(LoginRequiredMixin, OnlyAuthorMixin, UpdateView):
     model = Post
     template_name = 'blog/create.html'
@@ -108,6 +151,7 @@ class PostUpdateView(LoginRequiredMixin, OnlyAuthorMixin, UpdateView):
         )
 
 
+@breach_sensitive
 @login_required
 def post_delete(request, post_id):
     post = get_object_or_404(Post, id=post_id)
@@ -124,17 +168,30 @@ def post_delete(request, post_id):
     return render(request, 'blog/create.html', context={'form': form})
 
 
-class ProfileView(ListView):
+class ProfileView(
+        SurrogateKeyMixin, CachedPageMixin, StreamingFeedMixin,
+        FeedFragmentMixin, TemplateEngineMixin, ListView):
     template_name = 'blog/profile.html'
     context_object_name = 'post_list'
     paginate_by = MAX_POSTS
+    paginator_class = ElidedPaginator
+    fragment_url_name = 'blog:profile_more'
 
     def get_username(self):
         return self.kwargs.get('username')
 
+    def get_profile(self):
+        username = self.get_username()
+        return negative_cache.lookup('author', username, partial(
+            get_object_or_404, User, username=username))
+
+    def hole_punching_applies(self, request):
+        # Автор видит в своём профиле и скрытые публикации.
+        return (super().hole_punching_applies(request)
+                and request.user.get_username() != self.get_username())
+
     def get_queryset(self):
-        username = ProfileView.get_username(self)
-        user = get_object_or_404(User, username=username)
+        user = self.get_profile()
         if self.request.user == user:
             # Автор видит все свои посты, включая снятые с публикации
             return get_optimized_post_queryset(manager=user.posts,
@@ -150,11 +207,18 @@ class ProfileView(ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        username = ProfileView.get_username(self)
-        context['profile'] = get_object_or_404(User, username=username)
+        context['profile'] = self.get_profile()
         return context
 
+    def get_surrogate_keys(self, context):
+        return super().get_surrogate_keys(context) | {
+            f'author-{context["profile"].username}'}
+
+    def get_fragment_url_args(self):
+        return (self.get_username(),)
+
 
+@method_decorator(breach_sensitive, name='dispatch')
 class EditProfileView(LoginRequiredMixin, UpdateView):
     form_class = UserProfileForm
     template_name = 'blog/user.html'
@@ -167,6 +231,7 @@ class EditProfileView(LoginRequiredMixin, UpdateView):
                        kwargs={'username': self.request.user})
 
 
+@method_decorator(breach_sensitive, name='dispatch')
 class CommentCreateView(LoginRequiredMixin, CreateView):
     model = Comment
     form_class = CommentForm
@@ -184,6 +249,7 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
         )
 
 
+@method_decorator(breach_sensitive, name='dispatch')
 class CommentUpdateView(LoginRequiredMixin, OnlyAuthorMixin, UpdateView):
     model = Comment
     form_class = CommentForm
@@ -203,6 +269,7 @@ class CommentUpdateView(LoginRequiredMixin, OnlyAuthorMixin, UpdateView):
                        kwargs={'post_id': comment.post.id})
 
 
+@breach_sensitive
 @login_required
 def comment_delete(request, post_id, comment_id):
     comment = get_object_or_404(Comment, id=comment_id, post_id=post_id)
@@ -218,3 +285,25 @@ def comment_delete(request, post_id, comment_id):
         'post': comment.post,
         'comment': comment,
     })
+
+
+class IndexFragmentView(FeedFragmentView):
+    def get_queryset(self):
+        return get_optimized_post_queryset()
+
+
+class CategoryFragmentView(FeedFragmentView):
+    def get_queryset(self):
+        # Категория не запрашивается отдельно: у скрытой или несуществующей
+        # порция просто пуста.
+        return get_optimized_post_queryset(
+            manager=Post.objects.filter(
+                category__slug=self.kwargs['category_slug']))
+
+
+class ProfileFragmentView(FeedFragmentView):
+    def get_queryset(self):
+        username = self.kwargs['username']
+        return get_optimized_post_queryset(
+            manager=Post.objects.filter(author__username=username),
+            apply_filters=self.request.user.get_username() != username)
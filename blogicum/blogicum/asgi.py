@@ -14,3 +14,11 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
 
 application = get_asgi_application()
+
+# Шаблоны разбираются, а страницы ошибок отрисовываются до первого
+# запроса, а не во время него.
+from blog.template_warmup import warm_up  # noqa: E402
+from pages.error_pages import prerender_error_pages  # noqa: E402
+
+warm_up()
+prerender_error_pages()
@@ -32,11 +32,96 @@ CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
 LOGIN_REDIRECT_URL = 'blog:index'
 LOGIN_URL = 'login'
 MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_URL = '/media/'
+# Передача медиафайлов фронтенд-сервером после проверки доступа в Django:
+# None — отдавать самим, 'x-accel-redirect' (nginx) или 'x-sendfile'
+# (Apache, lighttpd). Для nginx MEDIA_OFFLOAD_PREFIX — internal-location,
+# указывающий на MEDIA_ROOT.
+MEDIA_OFFLOAD = None
+MEDIA_OFFLOAD_PREFIX = '/protected-media/'
+MEDIA_MAX_AGE = 60 * 60 * 24
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
+
+def profile_url(user):
+    # Модуль приложения нельзя импортировать до загрузки настроек.
+    from blog.url_prefixes import profile_url
+    return profile_url(user)
+
+
+# User.get_absolute_url — адрес профиля автора.
+ABSOLUTE_URL_OVERRIDES = {'auth.user': profile_url}
+
 MAX_POSTS = 10
+# Навигация по страницам: первые и последние PAGINATION_ON_ENDS страниц
+# и PAGINATION_ON_EACH_SIDE страниц вокруг текущей. Для выборок больше
+# PAGINATION_EXACT_COUNT_LIMIT записей вместо COUNT(*) берётся оценка
+# планировщика (только PostgreSQL); None — всегда считать точно.
+PAGINATION_ON_EACH_SIDE = 2
+PAGINATION_ON_ENDS = 1
+PAGINATION_EXACT_COUNT_LIMIT = 10000
+
+# Кеширование лент публикаций. Просроченная запись ещё
+# FEED_CACHE_STALE_GRACE секунд отдаётся читателям, пока её
+# перерисовывает фоновый пул потоков.
+FEED_CACHE_ENABLED = False
+FEED_CACHE_ALIAS = 'default'
+FEED_CACHE_TIMEOUT = 60
+FEED_CACHE_STALE_GRACE = 300
+FEED_CACHE_REFRESH_WORKERS = 2
+FEED_CACHE_REFRESH_QUEUE_SIZE = 32
+# Кешировать общий каркас страниц и для авторизованных пользователей,
+# дорисовывая их персональные части ({% hole %}) при каждом ответе.
+FEED_CACHE_HOLE_PUNCHING = False
+# Сжатие записей кеша крупнее порога: 'zlib', 'lz4' (если установлен
+# пакет lz4) или None.
+FEED_CACHE_COMPRESSION = 'zlib'
+FEED_CACHE_COMPRESSION_THRESHOLD = 1024
+FEED_CACHE_COMPRESSION_LEVEL = 6
+# Как часто писать в журнал сводку сжатия по семействам ключей, секунд
+# (0 — не писать).
+FEED_CACHE_COMPRESSION_LOG_INTERVAL = 300
+# Хранить вместе со страницами из кеша их копии, сжатые brotli и gzip,
+# чтобы CompressionMiddleware не сжимал их при каждом попадании.
+FEED_CACHE_PRECOMPRESS = True
+
+# Запоминать в кеше лент адреса несуществующих публикаций, профилей и
+# категорий: повторный запрос получает 404 без обращения к базе
+# (blog/negative_cache.py).
+NEGATIVE_CACHE_ENABLED = False
+NEGATIVE_CACHE_TIMEOUT = 60
+
+# Сжатие ответов (blog.compression.CompressionMiddleware): brotli, если
+# установлен пакет brotli, иначе gzip. Уровни — для сжатия на лету.
+RESPONSE_COMPRESSION_MIN_SIZE = 1024
+RESPONSE_COMPRESSION_GZIP_LEVEL = 6
+RESPONSE_COMPRESSION_BROTLI_QUALITY = 5
+RESPONSE_COMPRESSION_TYPES = (
+    'text/', 'application/json', 'application/javascript',
+    'application/xml', 'image/svg+xml',
+)
+
+# Отдавать ленты потоком: шапка страницы уходит клиенту до отрисовки
+# карточек. Действует, когда страница не берётся из кеша лент.
+FEED_STREAMING = False
+
+# Каталог, в который команда bake_site выгружает публичные страницы.
+BAKE_ROOT = BASE_DIR / 'baked'
+
+# Ключи Surrogate-Key для кеширующего прокси и сброс их при изменениях.
+SURROGATE_MAX_AGE = 0
+SURROGATE_PURGER = 'blog.purgers.LogPurger'
+SURROGATE_PURGE_LOG = None
+SURROGATE_PURGE_URL = 'http://127.0.0.1:6081/'
+SURROGATE_PURGE_TIMEOUT = 2
+# Обработка загруженных фото: 'thread', 'process' или 'sync'.
+IMAGE_PROCESSING_EXECUTOR = 'thread'
+IMAGE_PROCESSING_WORKERS = 2
+IMAGE_PROCESSING_QUEUE_SIZE = 100
+IMAGE_PROCESSING_RETRIES = 3
+IMAGE_PROCESSING_RETRY_DELAY = 1
 
 # Application definition
 
@@ -54,12 +139,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.template_profiler.TemplateProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'blogicum.urls'
@@ -80,8 +167,36 @@ TEMPLATES = [
             ],
         },
     },
+    {
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [BASE_DIR / 'jinja2'],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'environment': 'blog.jinja2.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+            ],
+        },
+    },
 ]
 
+# Движок для лент, профиля и страницы публикации: 'django' или 'jinja2'
+# (шаблоны из каталога jinja2/, см. blog/jinja2.py). В режиме jinja2
+# FEED_CACHE_HOLE_PUNCHING не действует.
+BLOG_TEMPLATE_ENGINE = 'django'
+
+# Замер времени отрисовки каждого шаблона и тега за запрос: заголовок
+# Server-Timing, строка в журнале blog.template_profiler, команда
+# template_profile. Выключено — шаблоны ничем не обёрнуты.
+TEMPLATE_PROFILING = False
+TEMPLATE_PROFILING_HEADER_LIMIT = 10
+
+# Разбирать все шаблоны при запуске рабочего процесса (см. wsgi.py).
+TEMPLATE_PRECOMPILE = False
+# Отрисовывать страницы ошибок при запуске рабочего процесса (см. wsgi.py);
+# иначе — при первой ошибке.
+ERROR_PAGES_PRERENDER = False
+
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
 
@@ -95,6 +210,12 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -137,6 +258,25 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [
     BASE_DIR / 'static_dev',
 ]
+STATIC_ROOT = BASE_DIR / 'collected_static'
+# Для боевого окружения: имена с хешем и сжатые копии .gz/.br, которые
+# создаёт collectstatic.
+# STATICFILES_STORAGE = 'blog.storage.CompressedManifestStaticFilesStorage'
+# Раздавать собранную статику самим Django, если нет фронтенд-сервера.
+STATIC_SERVE = False
+STATIC_MAX_AGE = 60 * 60
+# Стили страниц: урезанная командой purge_css сборка Bootstrap.
+# CSS_INLINE встраивает её в <style>, избавляя первую загрузку
+# от отдельного запроса.
+CSS_FILE = 'css/bootstrap.purged.css'
+CSS_INLINE = False
+# Классы, которые добавляются скриптами или не видны в шаблонах
+# (регулярные выражения).
+CSS_PURGE_SAFELIST = [
+    r'show', r'showing', r'hiding', r'fade', r'collaps(e|ed|ing)',
+    r'active', r'disabled', r'was-validated', r'is-(in)?valid',
+    r'(in)?valid-(feedback|tooltip)',
+]
 
 
 # Default primary key field type
@@ -0,0 +1,45 @@
+"""Настройки боевого окружения поверх settings.py.
+
+Запуск: DJANGO_SETTINGS_MODULE=blogicum.settings_production
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import TEMPLATES
+
+DEBUG = False
+# Ключ из settings.py опубликован вместе с кодом.
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured(
+        'Задайте секретный ключ в переменной окружения DJANGO_SECRET_KEY')
+ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost').split()
+
+# Шаблоны разбираются один раз на процесс: cached.Loader включён явно,
+# а не только при DEBUG = False, и заполняется при запуске.
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'context_processors': [
+            processor for processor in TEMPLATES[0]['OPTIONS'][
+                'context_processors']
+            if processor != 'django.template.context_processors.debug'
+        ],
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}, *TEMPLATES[1:]]
+TEMPLATE_PRECOMPILE = True
+ERROR_PAGES_PRERENDER = True
+
+STATICFILES_STORAGE = 'blog.storage.CompressedManifestStaticFilesStorage'
+FEED_CACHE_ENABLED = True
+NEGATIVE_CACHE_ENABLED = True
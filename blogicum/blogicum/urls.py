@@ -1,9 +1,12 @@
 from django.contrib import admin
 from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.views import LoginView
 from django.views.generic.edit import CreateView
-from django.urls import include, path, reverse_lazy
+from django.urls import include, path, re_path, reverse_lazy
 from django.conf import settings
-from django.conf.urls.static import static
+
+from blog.compression import breach_sensitive
+from blog.media import serve_media, serve_static
 
 
 handler404 = 'pages.views.page_not_found'
@@ -13,14 +16,25 @@ urlpatterns = [
     path('', include('blog.urls', namespace='blog')),
     path('pages/', include('pages.urls', namespace='pages')),
     path('admin/', admin.site.urls),
+    path('auth/login/', breach_sensitive(LoginView.as_view()), name='login'),
     path('auth/', include('django.contrib.auth.urls')),
     path(
         'auth/registration/',
-        CreateView.as_view(
+        breach_sensitive(CreateView.as_view(
             template_name='registration/registration_form.html',
             form_class=UserCreationForm,
             success_url=reverse_lazy('blog:index'),
-        ),
+        )),
         name='registration',
     ),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    re_path(
+        rf'^{settings.STATIC_URL.lstrip("/")}(?P<path>.+)$',
+        serve_static,
+        name='static',
+    ),
+    re_path(
+        rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.+)$',
+        serve_media,
+        name='media',
+    ),
+]
@@ -0,0 +1,63 @@
+"""Страницы ошибок, отрисованные заранее.
+
+Страница отрисовывается один раз на процесс — при запуске (см. wsgi.py
+и ERROR_PAGES_PRERENDER) или при первой ошибке — от имени анонимного
+читателя. В странице 500 шапка остаётся анонимной: обработчик не
+обращается ни к базе, ни к сессии. В остальных при ответе
+дорисовывается только персональная часть шапки ({% hole %}), а вместо
+метки подставляется адрес запроса.
+"""
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.html import escape
+
+from blog.caching import make_internal_request
+from blog.holes import fill_holes, make_skeleton_request
+
+# Подставляется в шаблон вместо request.build_absolute_uri.
+URL_MARKER = 'blog-error-page-url'
+
+_rendered = {}
+
+
+def render_error_page(template_name, personal=True):
+    request = make_internal_request('/')
+    if personal:
+        request = make_skeleton_request(request)
+    request.build_absolute_uri = lambda location=None: URL_MARKER
+    return render_to_string(template_name, request=request).encode()
+
+
+def get_error_page(template_name, personal=True):
+    key = (template_name, personal)
+    if key not in _rendered:
+        _rendered[key] = render_error_page(template_name, personal)
+    return _rendered[key]
+
+
+def prerender_error_pages():
+    """Вызывается из wsgi.py/asgi.py до приёма запросов."""
+    if not settings.ERROR_PAGES_PRERENDER:
+        return
+    get_error_page('pages/404.html')
+    get_error_page('pages/403csrf.html')
+    get_error_page('pages/500.html', personal=False)
+
+
+def error_response(request, template_name, status, personal=True):
+    content = get_error_page(template_name, personal)
+    if personal:
+        content = fill_holes(content, request)
+    if URL_MARKER.encode() in content:
+        content = content.replace(
+            URL_MARKER.encode(),
+            escape(request.build_absolute_uri()).encode())
+    return HttpResponse(content, status=status)
+
+
+@receiver(setting_changed)
+def clear_error_pages(**kwargs):
+    _rendered.clear()
@@ -1,17 +1,24 @@
 from django.shortcuts import render
+from django.urls import Resolver404
 from django.views.generic import TemplateView
 
+from .error_pages import error_response
+
 
 def page_not_found(request, exception):
+    # Несуществующие публикации, профили и категории перебирают боты:
+    # для них страница берётся готовой.
+    if not isinstance(exception, Resolver404):
+        return error_response(request, 'pages/404.html', 404)
     return render(request, 'pages/404.html', status=404)
 
 
 def csrf_failure(request, reason=''):
-    return render(request, 'pages/403csrf.html', status=403)
+    return error_response(request, 'pages/403csrf.html', 403)
 
 
 def server_error(request):
-    return render(request, 'pages/500.html', status=500)
+    return error_response(request, 'pages/500.html', 500, personal=False)
 
 
 class AboutView(TemplateView):
@@ -0,0 +1,61 @@
+// Подгрузка ленты при прокрутке. Без JavaScript, а также при ошибке
+// загрузки остаётся обычная навигация по страницам.
+(function () {
+  'use strict';
+
+  var nav = document.querySelector('nav[data-more]');
+  if (!nav || !window.fetch || !('IntersectionObserver' in window)) {
+    return;
+  }
+
+  // Карточки вставляются перед меткой; когда она видна, пора грузить.
+  var sentinel = document.createElement('div');
+  nav.parentNode.insertBefore(sentinel, nav);
+  nav.hidden = true;
+
+  var loading = false;
+  var observer = new IntersectionObserver(function (entries) {
+    if (entries[0].isIntersecting) {
+      load();
+    }
+  }, {rootMargin: '800px 0px'});
+
+  function finish() {
+    observer.disconnect();
+    sentinel.remove();
+    nav.remove();
+  }
+
+  function fail() {
+    observer.disconnect();
+    nav.hidden = false;
+  }
+
+  function load() {
+    if (loading) {
+      return;
+    }
+    loading = true;
+    fetch(nav.dataset.more, {credentials: 'same-origin'})
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.status);
+        }
+        var next = response.headers.get('X-Next-Page');
+        return response.text().then(function (html) {
+          sentinel.insertAdjacentHTML('beforebegin', html);
+          if (next) {
+            nav.dataset.more = next;
+          } else {
+            finish();
+          }
+        });
+      })
+      .catch(fail)
+      .then(function () {
+        loading = false;
+      });
+  }
+
+  observer.observe(sentinel);
+})();
@@ -41,6 +41,14 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def process_images_synchronously():
+    # В тестах on_commit срабатывает сразу, и поток пула писал бы в базу,
+    # пока ею пользуется уже следующий тест.
+    with override_settings(IMAGE_PROCESSING_EXECUTOR='sync'):
+        yield
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
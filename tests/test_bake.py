@@ -0,0 +1,65 @@
+import json
+import re
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.baking import page_file
+
+pytestmark = pytest.mark.django_db
+
+
+def bake(output, **options):
+    out = StringIO()
+    call_command('bake_site', output=str(output), workers=1, stdout=out,
+                 **options)
+    return dict(
+        (name, int(count)) for name, count in re.findall(
+            r'(перерисовано|без изменений|удалено|ошибок): (\d+)',
+            out.getvalue()))
+
+
+def test_bake_public_pages(
+        tmp_path, client, user, many_posts_with_published_locations):
+    post = many_posts_with_published_locations[0]
+    assert bake(tmp_path)['ошибок'] == 0
+    manifest = json.loads((tmp_path / 'manifest.json').read_text())
+    for url in ('/', '/?page=2', f'/posts/{post.id}/',
+                f'/category/{post.category.slug}/',
+                f'/profile/{user.username}/'):
+        assert url in manifest['pages'], (
+            f'Убедитесь, что страница {url} выгружается.')
+        path = tmp_path / manifest['pages'][url]['file']
+        assert path.read_bytes() == client.get(url).content
+    assert (tmp_path / 'index.html.gz').exists()
+
+
+def test_incremental_bake(
+        tmp_path, many_posts_with_published_locations):
+    first, second = many_posts_with_published_locations[:2]
+    bake(tmp_path)
+    assert bake(tmp_path)['перерисовано'] == 0, (
+        'Убедитесь, что без изменений страницы не перерисовываются.'
+    )
+
+    first.title = 'Новый заголовок'
+    first.save()
+    # Страница публикации, страница ленты, категории и профиля.
+    assert bake(tmp_path)['перерисовано'] == 4
+    assert 'Новый заголовок' in (
+        tmp_path / 'posts' / str(first.id) / 'index.html').read_text()
+
+    second.is_published = False
+    second.save()
+    counts = bake(tmp_path)
+    assert counts['удалено'] == 1
+    assert not (tmp_path / 'posts' / str(second.id)).joinpath(
+        'index.html').exists()
+    assert bake(tmp_path, full=True)['перерисовано'] > 4
+
+
+def test_page_file():
+    assert page_file('/') == 'index.html'
+    assert page_file('/category/x/?page=3') == 'category/x/index.page-3.html'
+    assert page_file('/profile/../') is None
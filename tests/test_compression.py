@@ -0,0 +1,106 @@
+import gzip
+
+import pytest
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from blog import compression
+from blog.compression import CompressionMiddleware, breach_sensitive
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_feed_is_gzipped(client, many_posts_with_published_locations):
+    plain = client.get('/')
+    response = client.get('/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+    assert response['Content-Encoding'] == 'gzip', (
+        'Убедитесь, что страницы сжимаются, если клиент принимает gzip.'
+    )
+    assert 'Accept-Encoding' in response['Vary']
+    assert int(response['Content-Length']) == len(response.content)
+    assert gzip.decompress(response.content) == plain.content
+
+
+def test_brotli_preferred(client, many_posts_with_published_locations):
+    brotli = pytest.importorskip('brotli')
+    plain = client.get('/')
+    response = client.get('/', HTTP_ACCEPT_ENCODING='gzip, br')
+    assert response['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.content) == plain.content
+
+
+def test_small_and_unaccepted_responses_not_compressed(
+        settings, client, many_posts_with_published_locations):
+    assert not client.get('/').has_header('Content-Encoding')
+    assert not client.get(
+        '/', HTTP_ACCEPT_ENCODING='gzip;q=0').has_header('Content-Encoding')
+    settings.RESPONSE_COMPRESSION_MIN_SIZE = 10 ** 6
+    assert not client.get(
+        '/', HTTP_ACCEPT_ENCODING='gzip').has_header('Content-Encoding')
+
+
+def test_streamed_feed_is_compressed(
+        settings, client, many_posts_with_published_locations):
+    settings.FEED_STREAMING = True
+    plain = b''.join(client.get('/').streaming_content)
+    response = client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+    assert response.streaming
+    assert response['Content-Encoding'] == 'gzip'
+    chunks = list(response.streaming_content)
+    assert len(chunks) > 2
+    assert gzip.decompress(b''.join(chunks)) == plain
+
+
+def test_cache_hit_skips_compression(
+        settings, monkeypatch, client, many_posts_with_published_locations):
+    settings.FEED_CACHE_ENABLED = True
+    plain = client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+    assert plain['X-Cache'] == 'MISS'
+
+    def fail(*args, **kwargs):
+        raise AssertionError('Страница из кеша сжимается повторно.')
+
+    monkeypatch.setattr(compression, 'compress', fail)
+    response = client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+    assert response['X-Cache'] == 'HIT'
+    assert response['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.content) == gzip.decompress(
+        plain.content)
+
+
+def test_secret_next_to_user_input_not_compressed():
+    @breach_sensitive
+    def view(request):
+        return HttpResponse(f'{request.GET.get("q", "")} secret ' * 200)
+
+    middleware = CompressionMiddleware(view)
+    factory = RequestFactory(HTTP_ACCEPT_ENCODING='gzip')
+    assert middleware(factory.get('/'))['Content-Encoding'] == 'gzip'
+    response = middleware(factory.get('/', {'q': 'secre'}))
+    assert not response.has_header('Content-Encoding'), (
+        'Убедитесь, что ответы с секретом рядом с данными из запроса '
+        'не сжимаются.'
+    )
+
+
+@pytest.mark.parametrize('url, data', [
+    ('/profile/edit/', {'username': '', 'email': 'secre'}),
+    ('/auth/login/', {'username': 'secre', 'password': 'x'}),
+    ('/auth/registration/', {'username': 'secre'}),
+])
+def test_forms_with_user_input_not_compressed(user_client, url, data):
+    assert user_client.get(
+        url, HTTP_ACCEPT_ENCODING='gzip')['Content-Encoding'] == 'gzip'
+    response = user_client.post(url, data, HTTP_ACCEPT_ENCODING='gzip')
+    assert response.status_code == 200
+    assert not response.has_header('Content-Encoding'), (
+        f'Убедитесь, что форма {url} с введёнными данными не сжимается.'
+    )
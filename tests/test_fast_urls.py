@@ -0,0 +1,55 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse, set_script_prefix
+
+from blog.models import Category, Comment, Post
+from blog.url_prefixes import fast_reverse
+
+
+@pytest.mark.parametrize('viewname, args', [
+    ('blog:index', ()),
+    ('blog:post_detail', (15,)),
+    ('blog:category_posts', ('travel-notes',)),
+    ('blog:profile', ('ivan.petrov+blog@mail',)),
+    ('blog:profile', ('пользователь',)),
+    ('blog:edit_comment', (3, 41)),
+])
+def test_fast_reverse_matches_reverse(viewname, args):
+    assert fast_reverse(viewname, *args) == reverse(viewname, args=args)
+
+
+def test_fast_reverse_respects_script_prefix():
+    set_script_prefix('/blog/')
+    try:
+        assert fast_reverse('blog:post_detail', 1) == '/blog/posts/1/'
+    finally:
+        set_script_prefix('/')
+    assert fast_reverse('blog:post_detail', 1) == '/posts/1/'
+
+
+def test_model_urls():
+    user = get_user_model()(username='author')
+    post = Post(pk=7, category=Category(slug='news'))
+    comment = Comment(pk=9, post=post, author=user)
+    assert user.get_absolute_url() == reverse(
+        'blog:profile', args=['author'])
+    assert post.get_absolute_url() == reverse('blog:post_detail', args=[7])
+    assert post.get_edit_url() == reverse('blog:edit_post', args=[7])
+    assert post.get_delete_url() == reverse('blog:delete_post', args=[7])
+    assert post.get_comment_url() == reverse('blog:add_comment', args=[7])
+    assert post.category.get_absolute_url() == reverse(
+        'blog:category_posts', args=['news'])
+    assert comment.get_absolute_url() == '/posts/7/#comment_9'
+    assert comment.get_edit_url() == reverse(
+        'blog:edit_comment', args=[7, 9])
+    assert comment.get_delete_url() == reverse(
+        'blog:delete_comment', args=[7, 9])
+
+
+def test_bench_urls_command():
+    out = StringIO()
+    call_command('bench_urls', comments=20, repeat=1, stdout=out)
+    assert 'ускорение' in out.getvalue()
@@ -0,0 +1,262 @@
+import time
+from io import StringIO
+
+import pytest
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.template import Context, Template
+from django.http import HttpResponse
+from django.test import override_settings
+from jinja2 import DictLoader
+
+from blog.cache_compression import (
+    CompressedValue, CompressingCache, compression_stats)
+from blog.caching import (
+    HIT, MISS, STALE, CachedPageMixin, StaleWhileRevalidateCache,
+    feed_cache, make_key)
+from blog.jinja2 import environment as jinja2_environment
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def feed_cache_enabled():
+    cache.clear()
+    with override_settings(FEED_CACHE_ENABLED=True):
+        yield
+    cache.clear()
+
+
+def test_anonymous_feed_served_from_cache(
+        client, post_with_published_location, django_assert_num_queries):
+    response = client.get('/')
+    assert response['X-Cache'] == 'MISS'
+    with django_assert_num_queries(0):
+        cached = client.get('/')
+    assert cached['X-Cache'] == 'HIT', (
+        'Убедитесь, что повторный запрос ленты анонимным пользователем '
+        'обслуживается из кеша.'
+    )
+    assert cached.content == response.content
+
+
+def test_feed_cache_invalidated_on_post_change(
+        client, post_with_published_location):
+    client.get('/')
+    post_with_published_location.title = 'Новый заголовок'
+    post_with_published_location.save()
+    response = client.get('/')
+    assert response['X-Cache'] == 'MISS'
+    assert 'Новый заголовок' in response.content.decode('utf-8')
+
+
+def test_logged_in_user_bypasses_page_cache(
+        user_client, post_with_published_location):
+    user_client.get('/')
+    assert 'X-Cache' not in user_client.get('/')
+
+
+def test_stale_entry_served_while_revalidating():
+    swr = StaleWhileRevalidateCache()
+    with override_settings(FEED_CACHE_TIMEOUT=0, FEED_CACHE_STALE_GRACE=60):
+        swr.set('key', 'old')
+        time.sleep(0.01)
+        value, state = swr.lookup('key')
+        assert (value, state) == ('old', STALE)
+        assert swr.revalidate('key', lambda: 'new')
+        swr._executor.shutdown(wait=True)
+    value, state = swr.lookup('key')
+    assert value == 'new'
+    assert state in (HIT, STALE)
+    assert swr.stats()['refresh_done'] == 1
+    assert swr.lookup('missing') == (None, MISS)
+
+
+def test_stale_page_refreshed_with_own_request(
+        client, monkeypatch, delayed_refresh):
+    requests = []
+
+    def render_page(view, request, *args, **kwargs):
+        requests.append(request)
+        return HttpResponse('<p>новая</p>')
+
+    client.get('/?page=1')
+    time.sleep(0.01)
+    monkeypatch.setattr(CachedPageMixin, 'render_page', render_page)
+    response = client.get('/?page=1')
+    assert response['X-Cache'] == 'STALE'
+    feed_cache._executor.shutdown(wait=True)
+    [request] = requests
+    assert request is not response.wsgi_request, (
+        'Убедитесь, что фоновая перерисовка страницы не использует '
+        'объект запроса, на который ещё отвечает основной поток.'
+    )
+    assert request.META is not response.wsgi_request.META
+    assert request.get_full_path() == '/?page=1'
+    assert not request.user.is_authenticated
+
+
+def test_refresh_queue_is_bounded():
+    swr = StaleWhileRevalidateCache()
+    with override_settings(FEED_CACHE_REFRESH_QUEUE_SIZE=1):
+        swr._refreshing.add('busy')
+        assert not swr.revalidate('key', lambda: 'new')
+        swr._refreshing.clear()
+    assert swr.stats()['refresh_dropped'] == 1
+
+
+@pytest.fixture
+def hole_punching():
+    with override_settings(FEED_CACHE_HOLE_PUNCHING=True):
+        yield
+
+
+@pytest.mark.usefixtures('hole_punching')
+def test_skeleton_shared_between_users(
+        user, another_user, user_client, another_user_client,
+        post_with_published_location, comment):
+    url = f'/posts/{post_with_published_location.id}/'
+    edit_url = f'/posts/{post_with_published_location.id}/edit/'
+    author_response = user_client.get(url)
+    assert author_response['X-Cache'] == 'MISS'
+    other_response = another_user_client.get(url)
+    assert other_response['X-Cache'] == 'HIT', (
+        'Убедитесь, что каркас страницы публикации общий для всех '
+        'пользователей.'
+    )
+    author_content = author_response.content.decode('utf-8')
+    other_content = other_response.content.decode('utf-8')
+    assert edit_url in author_content
+    assert edit_url not in other_content
+    assert user.username in author_content
+    assert another_user.username in other_content
+    assert 'blog-hole' not in other_content
+    assert 'csrfmiddlewaretoken' in other_content
+
+
+@pytest.mark.usefixtures('hole_punching')
+def test_anonymous_skeleton_has_no_user_parts(
+        client, post_with_published_location):
+    response = client.get(f'/posts/{post_with_published_location.id}/')
+    content = response.content.decode('utf-8')
+    assert 'csrfmiddlewaretoken' not in content
+    assert '/auth/login/' in content
+
+
+@pytest.mark.usefixtures('hole_punching')
+def test_author_sees_hidden_post_despite_skeleton(
+        user_client, unpublished_posts_with_published_locations):
+    post = unpublished_posts_with_published_locations[0]
+    response = user_client.get(f'/posts/{post.id}/')
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db(transaction=True)
+def test_warm_cache_command(client, many_posts_with_published_locations):
+    out = StringIO()
+    call_command('warm_cache', pages=2, top_posts=1, workers=2, rate=0,
+                 stdout=out, stderr=StringIO())
+    assert 'Прогрето записей: 4' in out.getvalue()
+    assert client.get('/')['X-Cache'] == 'HIT'
+    assert client.get('/?page=2')['X-Cache'] == 'HIT'
+
+
+def test_large_entries_compressed_small_kept_raw():
+    backend = caches['default']
+    wrapper = CompressingCache(backend, 'zlib')
+    compression_stats.reset()
+    page = b'<div class="card">' * 500
+    with override_settings(FEED_CACHE_COMPRESSION_THRESHOLD=1024):
+        wrapper.set('blog:page:1:abc', {'content': page})
+        wrapper.set('blog:counter', 1)
+        assert isinstance(backend.get('blog:page:1:abc'), CompressedValue)
+        assert backend.get('blog:counter') == 1
+        assert wrapper.get('blog:page:1:abc') == {'content': page}
+    report = compression_stats.report()
+    assert report['page']['ratio'] > 10
+    assert report['page']['decompressed'] == 1
+    assert 'counter' not in report
+
+
+def test_compressing_cache_bulk_methods(caplog):
+    wrapper = CompressingCache(caches['default'], 'zlib')
+    page = b'<div class="card">' * 500
+    with override_settings(FEED_CACHE_COMPRESSION_THRESHOLD=1024,
+                           FEED_CACHE_COMPRESSION_LOG_INTERVAL=0.001):
+        time.sleep(0.01)
+        with caplog.at_level('INFO', logger='blog.cache_compression'):
+            wrapper.set_many({'blog:page:1:a': page, 'blog:page:1:b': 'x'})
+        assert wrapper.get_many(['blog:page:1:a', 'blog:page:1:b']) == {
+            'blog:page:1:a': page, 'blog:page:1:b': 'x'}
+    assert 'page: сжато' in caplog.text
+    with override_settings(FEED_CACHE_COMPRESSION_THRESHOLD=1024):
+        assert wrapper.get_or_set('blog:page:1:c', lambda: page) == page
+        assert isinstance(
+            caches['default'].get('blog:page:1:c'), CompressedValue)
+        assert wrapper.get_or_set('blog:page:1:c', 'другое') == page, (
+            'Убедитесь, что get_or_set() возвращает уже сохранённое '
+            'значение.'
+        )
+
+
+def test_cache_compression_report(many_posts_with_published_locations):
+    out = StringIO()
+    call_command('cache_compression_report', samples=1, repeat=1,
+                 stdout=out)
+    assert out.getvalue().split('\n')[1].startswith('fragment'), (
+        'Убедитесь, что отчёт показывает сжатие по данным кеша лент.'
+    )
+
+
+@pytest.fixture
+def delayed_refresh(monkeypatch):
+    refresh = StaleWhileRevalidateCache._refresh
+
+    def delayed_refresh(self, *args):
+        # Цикл успевает уйти вперёд до перерисовки.
+        time.sleep(0.05)
+        refresh(self, *args)
+
+    monkeypatch.setattr(
+        StaleWhileRevalidateCache, '_refresh', delayed_refresh)
+    with override_settings(FEED_CACHE_TIMEOUT=0, FEED_CACHE_STALE_GRACE=60):
+        yield
+        feed_cache._executor.shutdown(wait=True)
+        feed_cache._executor = None
+
+
+def render_twice(render):
+    assert render() == '[1][2][3]'
+    time.sleep(0.01)
+    assert render() == '[1][2][3]'
+
+
+def assert_fragments_keep_loop_values(prefix):
+    for item in (1, 2, 3):
+        value, _ = feed_cache.lookup(make_key(prefix, item))
+        assert value == f'[{item}]', (
+            'Убедитесь, что фоновое обновление фрагмента в цикле '
+            'отрисовывается со своим элементом.'
+        )
+
+
+def test_fragment_refresh_keeps_loop_values(delayed_refresh):
+    template = Template(
+        "{% load blog_cache %}{% for p in items %}"
+        "{% swrcache 'loop' p %}[{{ p }}]{% endswrcache %}{% endfor %}")
+    render_twice(lambda: template.render(Context({'items': [1, 2, 3]})))
+    feed_cache._executor.shutdown(wait=True)
+    assert_fragments_keep_loop_values('fragment:loop')
+
+
+def test_jinja2_fragment_refresh_keeps_loop_values(delayed_refresh):
+    env = jinja2_environment(loader=DictLoader({
+        'loop.html': (
+            "{% for p in items %}"
+            "{{ swrcache('loop', 'item.html', p, p=p) }}{% endfor %}"),
+        'item.html': '[{{ p }}]',
+    }))
+    template = env.get_template('loop.html')
+    render_twice(lambda: template.render(items=[1, 2, 3]))
+    feed_cache._executor.shutdown(wait=True)
+    assert_fragments_keep_loop_values('fragment:jinja2:loop')
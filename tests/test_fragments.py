@@ -0,0 +1,90 @@
+import re
+
+import pytest
+from django.urls import reverse
+
+pytestmark = pytest.mark.django_db
+
+POST_LINK = re.compile(r'href="/posts/(\d+)/" class="card-link"')
+
+
+def post_ids(response):
+    return [int(pk) for pk in POST_LINK.findall(
+        response.content.decode('utf-8'))]
+
+
+def collect(client, url):
+    """Публикации из всех порций ленты, начиная с url."""
+    ids = []
+    while url:
+        response = client.get(url)
+        ids += post_ids(response)
+        url = response.get('X-Next-Page')
+    return ids
+
+
+def more_url(response):
+    match = re.search(r'data-more="([^"]+)"', response.content.decode())
+    return match and match[1].replace('&amp;', '&')
+
+
+def test_fragments_continue_feed(
+        client, settings, django_assert_num_queries,
+        many_posts_with_published_locations):
+    first = client.get(reverse('blog:index'))
+    second = client.get(reverse('blog:index') + '?page=2')
+    url = more_url(first)
+    assert url and url.startswith(reverse('blog:index_more')), (
+        'Убедитесь, что лента передаёт скрипту адрес следующей порции '
+        'публикаций.'
+    )
+    assert 'js/feed.js' in first.content.decode()
+    with django_assert_num_queries(1):
+        fragment = client.get(url)
+    assert fragment.status_code == 200
+    assert post_ids(fragment) == post_ids(second), (
+        'Убедитесь, что порция после курсора совпадает со следующей '
+        'страницей ленты.'
+    )
+    assert '<header>' not in fragment.content.decode()
+    assert 'X-Next-Page' not in fragment
+    assert more_url(second) is None
+
+
+def test_fragment_batches_cover_feed(
+        settings, client, many_posts_with_published_locations):
+    settings.MAX_POSTS = 3
+    seen = collect(client, reverse('blog:index_more'))
+    assert len(seen) == len(set(seen)) == len(
+        many_posts_with_published_locations)
+
+
+def test_category_and_profile_fragments(
+        client, user_client, user, many_posts_with_published_locations,
+        post_with_another_category,
+        unpublished_posts_with_published_locations):
+    slug = many_posts_with_published_locations[0].category.slug
+    category_ids = post_ids(client.get(
+        reverse('blog:category_more', args=[slug])))
+    assert post_with_another_category.id not in category_ids
+    assert post_ids(client.get(
+        reverse('blog:category_more', args=['no-such-category']))) == []
+
+    url = reverse('blog:profile_more', args=[user.username])
+    hidden = {post.id for post in unpublished_posts_with_published_locations}
+    assert not hidden & set(collect(client, url))
+    own = set(collect(user_client, url))
+    assert hidden <= own, (
+        'Убедитесь, что автор видит в подгружаемой ленте профиля свои '
+        'снятые с публикации записи.'
+    )
+
+
+@pytest.mark.parametrize('cursor', [
+    'abc', '99999999999999999999999.1', '-99999999999999999.5',
+    '0.99999999999999999999999', '0.0'])
+def test_broken_cursor(client, cursor):
+    response = client.get(reverse('blog:index_more') + f'?after={cursor}')
+    assert response.status_code == 400, (
+        'Убедитесь, что испорченный курсор даёт ответ 400.'
+    )
@@ -0,0 +1,408 @@
+import os
+import time
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.signals import post_save
+from PIL import Image
+
+from blog.image_tasks import image_processor
+from blog.images import candidate_names, is_sharded, save_variant
+from blog.models import ImageMetadata, Post, StoredImage
+
+pytestmark = [pytest.mark.django_db]
+
+
+def make_upload(size=(2000, 1500), name='photo.jpg', image_format='JPEG'):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, image_format)
+    return SimpleUploadedFile(
+        name, buffer.getvalue(), content_type='image/jpeg')
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def post_with_image(mixer, user, published_category,
+                    django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        post = mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            image=make_upload())
+    post.refresh_from_db()
+    return post
+
+
+def test_variants_generated_on_save(post_with_image, media_root):
+    variants = post_with_image.image_variants
+    assert variants['source'] == post_with_image.image.name
+    for variant, max_side in (('card', 640), ('detail', 1280)):
+        with Image.open(media_root / variants[variant]) as image:
+            assert max(image.size) == max_side, (
+                f'Убедитесь, что вариант `{variant}` уменьшен до '
+                f'{max_side} пикселей по большей стороне.'
+            )
+    assert post_with_image.card_image_url.endswith('.card.jpg')
+
+
+def test_feed_uses_card_variant(client, post_with_image):
+    content = client.get('/').content.decode('utf-8')
+    assert post_with_image.card_image_url in content
+    assert f'src="{post_with_image.image.url}"' not in content
+
+
+def test_responsive_webp_sources(client, post_with_image, media_root):
+    widths = post_with_image.image_variants['srcset']['webp']
+    assert [width for width, _ in widths] == [320, 640, 960, 1280]
+    with Image.open(media_root / widths[0][1]) as image:
+        assert image.format == 'WEBP'
+    content = client.get('/').content.decode('utf-8')
+    assert 'type="image/webp"' in content
+    assert f'{widths[0][1]} 320w' in content
+    assert 'loading="lazy"' in content and 'decoding="async"' in content
+
+
+def test_fallback_to_original_without_variants(post_with_image):
+    post_with_image.image_variants = {}
+    assert post_with_image.card_image_url == post_with_image.image.url
+
+
+def test_variants_regenerated_when_image_replaced(
+        post_with_image, django_capture_on_commit_callbacks):
+    old_card = post_with_image.image_variants['card']
+    post_with_image.image = make_upload(size=(1800, 1200), name='other.jpg')
+    with django_capture_on_commit_callbacks(execute=True):
+        post_with_image.save()
+    post_with_image.refresh_from_db()
+    assert post_with_image.image_variants['card'] != old_card
+    assert not post_with_image.image.storage.exists(old_card)
+
+
+def test_placeholder_until_variants_ready(
+        client, mixer, user, published_category):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=make_upload())
+    assert post.image_status == post.ImageStatus.PENDING
+    content = client.get(f'/posts/{post.id}/').content.decode('utf-8')
+    assert 'img/post_placeholder.svg' in content, (
+        'Убедитесь, что до завершения обработки фото на странице '
+        'публикации показывается заглушка.'
+    )
+
+
+def test_broken_image_marked_failed(
+        settings, monkeypatch, mixer, user, published_category,
+        django_capture_on_commit_callbacks):
+    delays = []
+    monkeypatch.setattr('blog.image_tasks.time.sleep', delays.append)
+    with django_capture_on_commit_callbacks(execute=True):
+        post = mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            image=SimpleUploadedFile('broken.jpg', b'not an image'))
+    post.refresh_from_db()
+    assert post.image_status == post.ImageStatus.FAILED
+    assert post.image_error
+    assert not delays, (
+        'Убедитесь, что файл, который не является изображением, '
+        'не обрабатывается повторно.'
+    )
+    assert post.card_image_url == post.image.url
+
+
+def test_unexpected_error_marks_failed(
+        settings, monkeypatch, mixer, user, published_category,
+        django_capture_on_commit_callbacks):
+    settings.IMAGE_PROCESSING_RETRIES = 2
+    delays = []
+    monkeypatch.setattr('blog.image_tasks.time.sleep', delays.append)
+
+    def fail(image):
+        raise ValueError('сбой Pillow')
+
+    monkeypatch.setattr('blog.images.generate_variants', fail)
+    with django_capture_on_commit_callbacks(execute=True):
+        post = mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            image=make_upload())
+    post.refresh_from_db()
+    assert post.image_status == post.ImageStatus.FAILED, (
+        'Убедитесь, что после любой ошибки обработки публикация не '
+        'остаётся в статусе «обрабатывается».'
+    )
+    assert post.image_error == 'сбой Pillow'
+    assert len(delays) == 1
+
+
+def test_image_metadata_stored(client, post_with_image):
+    metadata = post_with_image.image_metadata
+    assert (metadata.width, metadata.height) == (2000, 1500)
+    assert metadata.format == 'JPEG'
+    assert metadata.size == post_with_image.image.size
+    content = client.get('/').content.decode('utf-8')
+    assert 'width="640" height="480"' in content, (
+        'Убедитесь, что у фото в карточке указаны размеры варианта.'
+    )
+
+
+def test_backfill_image_metadata(post_with_image):
+    ImageMetadata.objects.all().delete()
+    call_command('backfill_image_metadata', stdout=StringIO())
+    assert ImageMetadata.objects.get(post=post_with_image).width == 2000
+
+
+def test_image_savings_report_counts_each_file_once(
+        mixer, user, published_category, post_with_image,
+        django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            image=post_with_image.image.name)
+        broken = mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            image=make_upload(size=(1000, 800)))
+    Post.objects.filter(pk=broken.pk).update(
+        image_variants={'card': 'post_images/missing.jpg', 'srcset': {}})
+    out = StringIO()
+    call_command('image_savings_report', stdout=out)
+    original = post_with_image.image.size / 1024
+    assert out.getvalue().startswith(
+        f'Фото: 1, оригиналы: {original:.0f} КБ'), (
+        'Убедитесь, что отчёт считает общий файл один раз и не учитывает '
+        'фото, размеры копий которых не удалось узнать.'
+    )
+
+
+def test_upload_path_is_sharded(post_with_image):
+    assert is_sharded(post_with_image.image.name), (
+        'Убедитесь, что фото сохраняются в подкаталоги вида '
+        '`post_images/ab/cd/`.'
+    )
+
+
+def test_shard_post_images_command(
+        post_with_image, media_root, django_capture_on_commit_callbacks):
+    legacy = 'post_images/legacy.jpg'
+    card = f'{legacy}.card.jpg'
+    name = post_with_image.image.name
+    variants = post_with_image.image_variants
+    (media_root / legacy).write_bytes(post_with_image.image.read())
+    (media_root / card).write_bytes(b'card')
+    StoredImage.objects.filter(name=name).update(name=legacy)
+    type(post_with_image).objects.filter(pk=post_with_image.pk).update(
+        image=legacy,
+        image_variants={'source': legacy, 'card': card,
+                        'srcset': variants['srcset']})
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command('shard_post_images', stdout=StringIO())
+
+    post_with_image.refresh_from_db()
+    assert post_with_image.image.name == name, (
+        'Убедитесь, что перенесённое фото получает имя по хешу '
+        'содержимого и совпадает с таким же загруженным фото.'
+    )
+    assert post_with_image.image_variants['card'] == variants['card']
+    assert (media_root / name).exists()
+    assert not (media_root / legacy).exists()
+    assert not (media_root / card).exists()
+    assert StoredImage.objects.get(name=name).refcount == 1
+    assert not StoredImage.objects.filter(name=legacy).exists()
+
+    out = StringIO()
+    call_command('shard_post_images', stdout=out)
+    assert 'Перенесено фото: 0' in out.getvalue()
+
+
+def test_shard_post_images_copies_new_content(
+        post_with_image, media_root, django_capture_on_commit_callbacks):
+    legacy = 'post_images/legacy.png'
+    buffer = BytesIO()
+    Image.new('RGB', (10, 10), 'blue').save(buffer, 'PNG')
+    (media_root / legacy).write_bytes(buffer.getvalue())
+    StoredImage.objects.filter(name=post_with_image.image.name).update(
+        name=legacy)
+    type(post_with_image).objects.filter(pk=post_with_image.pk).update(
+        image=legacy, image_variants={})
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command('shard_post_images', stdout=StringIO())
+
+    post_with_image.refresh_from_db()
+    name = post_with_image.image.name
+    assert is_sharded(name)
+    assert (media_root / name).read_bytes() == buffer.getvalue()
+    assert not (media_root / legacy).exists()
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    post_ids = []
+    monkeypatch.setattr(
+        image_processor, 'schedule',
+        lambda post_id, using=None: post_ids.append(post_id))
+    return post_ids
+
+
+def test_identical_uploads_stored_once(
+        mixer, user, published_category, post_with_image, media_root,
+        scheduled, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        twin = mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            image=make_upload(name='copy.jpg'))
+    assert twin.image.name == post_with_image.image.name, (
+        'Убедитесь, что одинаковые фото хранятся одним файлом.'
+    )
+    assert twin.image_status == twin.ImageStatus.READY
+    assert twin.image_variants == post_with_image.image_variants
+    assert StoredImage.objects.get(name=twin.image.name).refcount == 2
+    assert not scheduled
+
+    card = media_root / twin.image_variants['card']
+    with django_capture_on_commit_callbacks(execute=True):
+        twin.delete()
+    assert (media_root / post_with_image.image.name).exists()
+    with django_capture_on_commit_callbacks(execute=True):
+        post_with_image.delete()
+    assert not (media_root / twin.image.name).exists()
+    assert not card.exists()
+
+
+def test_reupload_while_delete_pending(
+        mixer, user, published_category, post_with_image, media_root,
+        scheduled, django_capture_on_commit_callbacks):
+    name = post_with_image.image.name
+    with django_capture_on_commit_callbacks() as pending:
+        post_with_image.delete()
+    twin = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=make_upload(name='again.jpg'))
+    for callback in pending:
+        callback()
+    assert twin.image.name == name
+    assert (media_root / name).exists(), (
+        'Убедитесь, что отложенное удаление не стирает файл, который '
+        'снова загрузили.'
+    )
+
+
+def test_file_restored_when_deleted_during_upload(
+        mixer, user, published_category, post_with_image, media_root,
+        scheduled, django_capture_on_commit_callbacks):
+    name = post_with_image.image.name
+    with django_capture_on_commit_callbacks() as pending:
+        post_with_image.delete()
+
+    def run_pending_delete(sender, **kwargs):
+        # Файл уже найден при загрузке, но удаляется до acquire().
+        for callback in pending:
+            callback()
+
+    post_save.connect(run_pending_delete, sender=Post)
+    try:
+        twin = mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            image=make_upload(name='again.jpg'))
+    finally:
+        post_save.disconnect(run_pending_delete, sender=Post)
+    assert twin.image.name == name
+    assert (media_root / name).exists()
+    assert StoredImage.objects.get(name=name).refcount == 1
+
+
+def test_variants_overwritten_in_place(post_with_image, media_root):
+    # Одно фото могут обрабатывать два процесса сразу.
+    card = post_with_image.image_variants['card']
+    assert save_variant(
+        post_with_image.image.storage, card, b'second') == card
+    assert (media_root / card).read_bytes() == b'second'
+
+
+def test_unchanged_reupload_skips_processing(post_with_image, scheduled):
+    name = post_with_image.image.name
+    post_with_image.image = make_upload(name='again.jpg')
+    post_with_image.save()
+    assert post_with_image.image.name == name
+    assert post_with_image.image_status == post_with_image.ImageStatus.READY
+    assert StoredImage.objects.get(name=name).refcount == 1
+    assert not scheduled
+
+
+def test_sweep_media_removes_orphans(post_with_image, media_root):
+    name = post_with_image.image.name
+    orphan = media_root / 'post_images' / 'ff' / 'ff' / 'orphan.jpg'
+    orphan.parent.mkdir(parents=True)
+    orphan.write_bytes(b'x')
+    orphan_variant = media_root / 'post_images' / 'orphan.jpg.card.jpg'
+    orphan_variant.write_bytes(b'x')
+    fresh = media_root / 'post_images' / 'fresh.jpg'
+    fresh.write_bytes(b'x')
+    old = time.time() - 2 * 24 * 3600
+    for path in media_root.rglob('*'):
+        if path.is_file() and path != fresh:
+            os.utime(path, (old, old))
+
+    out = StringIO()
+    call_command('sweep_media', dry_run=True, stdout=out)
+    assert 'Будет удалено файлов: 2' in out.getvalue()
+    assert orphan.exists()
+
+    call_command('sweep_media', stdout=StringIO())
+    assert not orphan.exists() and not orphan_variant.exists()
+    assert fresh.exists(), (
+        'Убедитесь, что файлы моложе срока ожидания не удаляются.'
+    )
+    assert (media_root / name).exists()
+    assert (media_root / post_with_image.image_variants['card']).exists()
+
+
+def test_media_served_with_range(client, post_with_image, media_root):
+    url = post_with_image.image.url
+    content = (media_root / post_with_image.image.name).read_bytes()
+    response = client.get(url, HTTP_RANGE='bytes=10-19')
+    assert response.status_code == 206
+    assert b''.join(response.streaming_content) == content[10:20]
+    assert response['Content-Range'] == f'bytes 10-19/{len(content)}'
+    assert client.get(
+        url, HTTP_RANGE=f'bytes={len(content)}-').status_code == 416
+
+    last_modified = client.get(url)['Last-Modified']
+    assert client.get(
+        url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+
+
+def test_media_of_hidden_post_not_served(
+        client, user_client, post_with_image):
+    post_with_image.is_published = False
+    post_with_image.save()
+    assert client.get(post_with_image.card_image_url).status_code == 404, (
+        'Убедитесь, что фото скрытых публикаций недоступны посторонним.'
+    )
+    assert user_client.get(post_with_image.card_image_url).status_code == 200
+
+
+def test_media_offloaded_to_front_server(settings, client, post_with_image):
+    settings.MEDIA_OFFLOAD = 'x-accel-redirect'
+    response = client.get(post_with_image.image.url)
+    assert response['X-Accel-Redirect'] == (
+        f'/protected-media/{post_with_image.image.name}')
+    assert not response.content
+
+
+def test_media_visibility_lookup_uses_index():
+    queryset = Post.objects.filter(
+        image__in=candidate_names('post_images/ab/ab.jpg.card.jpg'))
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        plan = ' '.join(str(row) for row in cursor.fetchall())
+    assert 'INDEX' in plan, (
+        'Убедитесь, что проверка доступа к фото ищет публикации по '
+        'индексу, а не просмотром всей таблицы.'
+    )
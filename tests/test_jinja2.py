@@ -0,0 +1,59 @@
+import difflib
+import re
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+pytestmark = pytest.mark.django_db
+
+CSRF_VALUE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*')
+
+
+def normalize(html):
+    # Движки по-разному расставляют пробелы и переводы строк, а токен
+    # CSRF различается при каждой отрисовке.
+    html = CSRF_VALUE.sub(r'\1', html)
+    html = re.sub(r'\s+', ' ', html)
+    return re.sub(r'\s*([<>])\s*', r'\1', html).strip()
+
+
+def render(client, url, engine):
+    with override_settings(BLOG_TEMPLATE_ENGINE=engine):
+        response = client.get(url)
+    assert response.status_code == 200
+    assert response.using == engine
+    return normalize(response.content.decode('utf-8'))
+
+
+@pytest.fixture
+def pages(
+        mixer, user, post_with_published_location,
+        many_posts_with_published_locations):
+    post = post_with_published_location
+    post.text = 'Первая строка\nвторая <b>строка</b> ' + 'слово ' * 20
+    post.save()
+    mixer.blend(
+        'blog.Comment', post=post, author=user, text='Да\nи <i>нет</i>')
+    return [
+        reverse('blog:index'),
+        reverse('blog:index') + '?page=2',
+        reverse('blog:category_posts', args=[post.category.slug]),
+        reverse('blog:profile', args=[user.username]),
+        reverse('blog:post_detail', args=[post.id]),
+    ]
+
+
+@pytest.mark.parametrize('client_name', ['client', 'user_client'])
+def test_jinja2_templates_match_django(request, pages, client_name):
+    client = request.getfixturevalue(client_name)
+    for url in pages:
+        django_html = render(client, url, 'django')
+        jinja2_html = render(client, url, 'jinja2')
+        diff = '\n'.join(difflib.unified_diff(
+            django_html.split('><'), jinja2_html.split('><'),
+            'django', 'jinja2', lineterm=''))
+        assert django_html == jinja2_html, (
+            f'Убедитесь, что шаблоны Jinja2 для {url} выводят ту же '
+            f'разметку, что и шаблоны Django:\n{diff}'
+        )
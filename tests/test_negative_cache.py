@@ -0,0 +1,80 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.test import override_settings
+
+from pages import error_pages
+from pages.error_pages import prerender_error_pages
+from pages.views import csrf_failure, server_error
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def negative_cache_enabled():
+    cache.clear()
+    with override_settings(NEGATIVE_CACHE_ENABLED=True):
+        yield
+    cache.clear()
+
+
+def test_repeated_miss_skips_database(client, django_assert_num_queries):
+    url = '/profile/nobody-yet/'
+    assert client.get(url).status_code == 404
+    with django_assert_num_queries(0):
+        response = client.get(url)
+    assert response.status_code == 404, (
+        'Убедитесь, что повторный запрос несуществующего профиля '
+        'получает 404 без обращения к базе.'
+    )
+    content = response.content.decode()
+    assert 'Страница не найдена' in content
+    assert f'http://testserver{url}' in content
+    assert 'Регистрация' in content
+
+    get_user_model().objects.create(username='nobody-yet')
+    assert client.get(url).status_code == 200, (
+        'Убедитесь, что запомненный промах сбрасывается, когда объект '
+        'появляется.'
+    )
+
+
+def test_author_sees_hidden_post_after_anonymous_miss(
+        client, user_client, unpublished_posts_with_published_locations):
+    url = f'/posts/{unpublished_posts_with_published_locations[0].id}/'
+    assert client.get(url).status_code == 404
+    assert client.get(url).status_code == 404
+    assert user_client.get(url).status_code == 200
+
+
+def test_category_miss(client, django_assert_num_queries):
+    client.get('/category/no-such-category/')
+    with django_assert_num_queries(0):
+        assert client.get('/category/no-such-category/').status_code == 404
+
+
+def test_prerendered_error_pages(user):
+    request = HttpRequest()
+    request.user = user
+    response = csrf_failure(request)
+    assert response.status_code == 403
+    assert user.username in response.content.decode(), (
+        'Убедитесь, что в готовой странице ошибки дорисовывается '
+        'персональная часть шапки.'
+    )
+    response = server_error(request)
+    assert response.status_code == 500
+    assert user.username not in response.content.decode()
+    assert 'Ошибка сервера' in response.content.decode()
+
+
+def test_error_pages_prerendered_only_when_enabled(settings):
+    prerender_error_pages()
+    assert not error_pages._rendered, (
+        'Убедитесь, что страницы ошибок отрисовываются при запуске '
+        'только при ERROR_PAGES_PRERENDER.'
+    )
+    settings.ERROR_PAGES_PRERENDER = True
+    prerender_error_pages()
+    assert ('pages/500.html', False) in error_pages._rendered
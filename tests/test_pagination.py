@@ -0,0 +1,79 @@
+import pytest
+from django.core.paginator import EmptyPage, Paginator
+
+from blog.pagination import ElidedPaginator, page_window
+from blog.views import IndexView
+
+
+@pytest.mark.parametrize('number, last, expected', [
+    (1, 1, [1]),
+    (1, 5, [1, 2, 3, 4, 5]),
+    (50, 100, [1, None, 48, 49, 50, 51, 52, None, 100]),
+    (4, 100, [1, 2, 3, 4, 5, 6, None, 100]),
+    (100, 100, [1, None, 98, 99, 100]),
+])
+def test_page_window(number, last, expected):
+    assert page_window(number, last) == expected
+
+
+def test_page_window_without_tail():
+    assert page_window(50, 100, tail=False) == [
+        1, None, 48, 49, 50, 51, 52, None]
+
+
+@pytest.mark.django_db
+def test_feed_paginator_is_elided(
+        client, monkeypatch, many_posts_with_published_locations):
+    monkeypatch.setattr(IndexView, 'paginate_by', 1)
+    total = len(many_posts_with_published_locations)
+    response = client.get('/?page=10')
+    assert response.context['page_obj'].page_window == [
+        1, None, 8, 9, 10, 11, 12, None, total]
+    content = response.content.decode('utf-8')
+    assert content.count('class="page-item') == 2 + 9 + 2, (
+        'Убедитесь, что навигация по страницам выводит только окно '
+        'номеров вокруг текущей страницы.'
+    )
+
+
+def test_estimated_count_skips_exact_count(settings):
+    settings.PAGINATION_EXACT_COUNT_LIMIT = 100
+    items = list(range(25))
+
+    class EstimatingPaginator(ElidedPaginator):
+        def estimate_count(self):
+            return 1000
+
+    paginator = EstimatingPaginator(items, 10)
+    assert paginator.count == 1000 and paginator.count_is_estimate
+    page = paginator.page(3)
+    assert list(page) == list(range(20, 25))
+    assert not page.has_next()
+    assert page.page_window == [1, 2, 3]
+    assert paginator.page(2).has_next()
+    assert Paginator(items, 10).count == 25
+
+
+@pytest.mark.parametrize('estimate', [30, 1000])
+def test_estimate_does_not_limit_pages(settings, estimate):
+    settings.PAGINATION_EXACT_COUNT_LIMIT = 10
+    items = list(range(95))
+
+    class EstimatingPaginator(ElidedPaginator):
+        def estimate_count(self):
+            return estimate
+
+    paginator = EstimatingPaginator(items, 10)
+    page = paginator.page(5)
+    assert page.has_next() and page.next_page_number() == 6, (
+        'Убедитесь, что переход на следующую страницу не зависит от '
+        'оценки числа записей.'
+    )
+    assert 6 in page.page_window
+    last = paginator.page(10)
+    assert list(last) == list(range(90, 95))
+    assert not last.has_next()
+    with pytest.raises(EmptyPage):
+        last.next_page_number()
+    with pytest.raises(EmptyPage):
+        paginator.page(11)
@@ -0,0 +1,94 @@
+from io import StringIO
+
+import pytest
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+
+from blog.css_purge import compile_safelist, purge
+from blog.storage import brotli
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def collected(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    settings.STATICFILES_STORAGE = (
+        'blog.storage.CompressedManifestStaticFilesStorage')
+    settings.STATIC_SERVE = True
+    call_command('collectstatic', interactive=False, verbosity=0)
+    return tmp_path
+
+
+def test_collectstatic_writes_compressed_siblings(collected):
+    name = staticfiles_storage.stored_name('css/bootstrap.min.css')
+    assert name != 'css/bootstrap.min.css'
+    original = (collected / name).stat().st_size
+    gzipped = collected / f'{name}.gz'
+    assert gzipped.exists(), (
+        'Убедитесь, что collectstatic создаёт сжатые копии статики.'
+    )
+    assert gzipped.stat().st_size < original / 3
+    if brotli is not None:
+        assert (collected / f'{name}.br').exists()
+
+
+def test_static_served_precompressed(client, collected):
+    name = staticfiles_storage.stored_name('css/bootstrap.min.css')
+    response = client.get(
+        f'/static/{name}', HTTP_ACCEPT_ENCODING='gzip, deflate')
+    assert response.status_code == 200
+    assert response['Content-Encoding'] == 'gzip'
+    assert response['Content-Type'] == 'text/css'
+    assert 'immutable' in response['Cache-Control']
+    assert response['Vary'] == 'Accept-Encoding'
+
+    plain = client.get(f'/static/{name}', HTTP_ACCEPT_ENCODING='identity')
+    assert 'Content-Encoding' not in plain
+    assert client.get(
+        '/static/css/bootstrap.min.css'
+    )['Cache-Control'].startswith('public, max-age=')
+
+
+def test_static_report(collected):
+    out = StringIO()
+    call_command('static_report', repeat=1, stdout=out)
+    assert 'bootstrap.min' in out.getvalue()
+
+
+def test_purge_keeps_only_used_selectors():
+    css = (
+        '/*! license */.btn{color:red}.card,.unused{margin:0}'
+        '.unused .btn{x:y}@media (min-width:1px){.unused{a:b}.btn{a:b}}'
+        '.btn:not(.collapsed){a:b}p{margin:0}'
+        '@keyframes spin{to{x:y}}@keyframes gone{to{x:y}}'
+        '.btn{animation:spin 1s}'
+    )
+    purged, stats = purge(css, {'btn', 'card'})
+    assert purged == (
+        '/*! license */.btn{color:red}.card{margin:0}'
+        '@media (min-width:1px){.btn{a:b}}'
+        '.btn:not(.collapsed){a:b}p{margin:0}'
+        '@keyframes spin{to{x:y}}.btn{animation:spin 1s}'
+    )
+    assert stats == {'rules': 8, 'kept': 6}
+    assert '.unused' in purge(css, set(), compile_safelist([r'unus\w+']))[0]
+
+
+def test_purge_css_command(settings, tmp_path, client):
+    output = tmp_path / 'bootstrap.purged.css'
+    out = StringIO()
+    call_command('purge_css', output=str(output), stdout=out)
+    purged = output.read_text(encoding='utf-8')
+    assert len(purged) < 155631 / 3, (
+        'Убедитесь, что урезанный файл стилей заметно меньше исходного.'
+    )
+    for selector in ('.navbar', '.card-body', '.form-control', '.btn-primary',
+                     '.is-invalid'):
+        assert selector in purged
+    assert '.carousel' not in purged
+    assert '->' in out.getvalue()
+
+    settings.CSS_INLINE = True
+    content = client.get('/').content.decode('utf-8')
+    assert '<style>' in content and '.navbar' in content
@@ -0,0 +1,62 @@
+import re
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+pytestmark = pytest.mark.django_db
+
+
+def normalize(html):
+    return re.sub(r'\s*([<>])\s*', r'\1', re.sub(r'\s+', ' ', html)).strip()
+
+
+@pytest.fixture
+def feed_urls(user, many_posts_with_published_locations):
+    post = many_posts_with_published_locations[0]
+    return [
+        reverse('blog:index'),
+        reverse('blog:category_posts', args=[post.category.slug]),
+        reverse('blog:profile', args=[user.username]),
+    ]
+
+
+@pytest.mark.parametrize('engine', ['django', 'jinja2'])
+def test_feed_is_streamed(settings, user_client, feed_urls, engine):
+    settings.BLOG_TEMPLATE_ENGINE = engine
+    for url in feed_urls:
+        settings.FEED_STREAMING = False
+        whole = user_client.get(url)
+        settings.FEED_STREAMING = True
+        response = user_client.get(url)
+        assert response.streaming, (
+            f'Убедитесь, что при FEED_STREAMING страница {url} '
+            'отдаётся потоком.'
+        )
+        assert response['X-Accel-Buffering'] == 'no'
+        assert response['Surrogate-Key'] == whole['Surrogate-Key']
+        chunks = [
+            chunk.decode('utf-8') for chunk in response.streaming_content]
+        assert '<link rel="stylesheet"' in chunks[0]
+        assert '</header>' in chunks[0]
+        assert 'card-title' not in chunks[0], (
+            'Убедитесь, что шапка страницы отправляется до карточек '
+            'публикаций.'
+        )
+        assert len(chunks) == 2 + settings.MAX_POSTS
+        assert normalize(''.join(chunks)) == normalize(
+            whole.content.decode('utf-8'))
+
+
+def test_cached_feed_is_not_streamed(settings, client, feed_urls):
+    settings.FEED_STREAMING = True
+    settings.FEED_CACHE_ENABLED = True
+    assert not client.get(feed_urls[0]).streaming
+
+
+def test_measure_ttfb_command(feed_urls):
+    out = StringIO()
+    call_command('measure_ttfb', feed_urls[0], repeat=1, stdout=out)
+    assert 'поток' in out.getvalue()
+    assert 'целиком' in out.getvalue()
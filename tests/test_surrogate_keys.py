@@ -0,0 +1,121 @@
+import pytest
+from django.db import transaction
+from django.test import override_settings
+
+from blog import purgers
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_feed_tagged_with_surrogate_keys(
+        client, post_with_published_location):
+    post = post_with_published_location
+    keys = client.get('/')['Surrogate-Key'].split()
+    for key in (
+        'index',
+        f'post-{post.id}',
+        f'author-{post.author.username}',
+        f'category-{post.category.slug}',
+    ):
+        assert key in keys, (
+            f'Убедитесь, что ответ главной страницы помечен ключом `{key}`.'
+        )
+
+    detail_keys = client.get(f'/posts/{post.id}/')['Surrogate-Key'].split()
+    assert f'post-{post.id}' in detail_keys
+    assert 'index' not in detail_keys
+
+
+@override_settings(SURROGATE_MAX_AGE=600)
+def test_surrogate_control_only_for_anonymous(
+        client, user_client, post_with_published_location):
+    assert client.get('/')['Surrogate-Control'] == 'max-age=600'
+    assert not user_client.get('/').has_header('Surrogate-Control')
+
+
+def test_bulk_change_purges_each_key_once(
+        tmp_path, many_posts_with_published_locations,
+        django_capture_on_commit_callbacks):
+    purge_log = tmp_path / 'purge.log'
+    with override_settings(SURROGATE_PURGE_LOG=str(purge_log)):
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                for post in many_posts_with_published_locations:
+                    post.is_published = False
+                    post.save()
+    purged = purge_log.read_text().split()
+    assert len(purged) == len(set(purged)), (
+        'Убедитесь, что каждый ключ сбрасывается один раз за транзакцию.'
+    )
+    assert 'index' in purged
+    assert {
+        f'post-{post.id}' for post in many_posts_with_published_locations
+    } <= set(purged)
+
+
+def test_pending_keys_belong_to_their_transaction(
+        tmp_path, post_with_published_location, published_category,
+        django_capture_on_commit_callbacks):
+    purge_log = tmp_path / 'purge.log'
+    post = post_with_published_location
+    old_slug = published_category.slug
+    with override_settings(SURROGATE_PURGE_LOG=str(purge_log)):
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                with transaction.atomic():
+                    post.title = 'Откат'
+                    post.save()
+                    transaction.set_rollback(True)
+                published_category.slug = 'new-slug'
+                published_category.save()
+    purged = set(purge_log.read_text().split())
+    assert f'post-{post.id}' not in purged, (
+        'Убедитесь, что ключи из откаченного блока не сбрасываются.'
+    )
+    assert purged == {'category-new-slug', f'category-{old_slug}'}, (
+        'Убедитесь, что при смене адреса категории сбрасывается и ключ '
+        'старого адреса.'
+    )
+
+
+def test_nested_blocks_purge_each_key_once(
+        tmp_path, post_with_published_location,
+        django_capture_on_commit_callbacks):
+    purge_log = tmp_path / 'purge.log'
+    post = post_with_published_location
+    with override_settings(SURROGATE_PURGE_LOG=str(purge_log)):
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                with transaction.atomic():
+                    post.title = 'Первая правка'
+                    post.save()
+                post.title = 'Вторая правка'
+                post.save()
+                with transaction.atomic():
+                    post.save()
+    purged = purge_log.read_text().split()
+    assert purged.count(f'post-{post.id}') == 1, (
+        'Убедитесь, что ключи из вложенных блоков atomic сбрасываются '
+        'один раз за транзакцию.'
+    )
+
+
+def test_http_purger_sends_keys_in_one_request(monkeypatch):
+    requests = []
+
+    class Response:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+    def urlopen(request, timeout):
+        requests.append(request)
+        return Response()
+
+    monkeypatch.setattr(purgers.urllib.request, 'urlopen', urlopen)
+    purgers.HttpPurger().purge(['index', 'post-1', 'post-2'])
+    [request] = requests
+    assert request.get_method() == 'PURGE'
+    assert request.get_header('Surrogate-key') == 'index post-1 post-2'
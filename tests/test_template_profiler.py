@@ -0,0 +1,56 @@
+import logging
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.template_profiler import RenderProfile, profile_stats
+
+pytestmark = pytest.mark.django_db
+
+
+def test_self_time_excludes_nested_templates():
+    profile = RenderProfile()
+
+    def page():
+        profile.measure('card.html', lambda: None)
+        return profile.measure('page.html', lambda: 'inner')
+
+    assert profile.measure('page.html', page) == 'inner'
+    calls, cumulative, own = profile.stats['page.html']
+    assert calls == 2
+    assert own <= cumulative
+    card = profile.stats['card.html']
+    assert cumulative >= own + card[1], (
+        'Убедитесь, что полное время шаблона, подключённого в самого себя, '
+        'не учитывается дважды.'
+    )
+
+
+def test_profiled_request(
+        settings, client, caplog, many_posts_with_published_locations):
+    settings.TEMPLATE_PROFILING = True
+    profile_stats.reset()
+    with caplog.at_level(logging.INFO, logger='blog.template_profiler'):
+        response = client.get('/')
+    timing = response['Server-Timing']
+    assert timing.startswith('tpl;desc="total";dur=')
+    assert 'includes/post_card.html x10' in timing, (
+        'Убедитесь, что в заголовке Server-Timing есть время шаблонов, '
+        'подключаемых на странице.'
+    )
+    assert 'base.html' in caplog.text
+    requests, stats = profile_stats.report()
+    assert requests == 1
+    assert stats['includes/post_card.html'][0] == 10
+
+
+def test_profiling_disabled(client, many_posts_with_published_locations):
+    assert not client.get('/').has_header('Server-Timing')
+
+
+def test_template_profile_command(many_posts_with_published_locations):
+    out = StringIO()
+    call_command('template_profile', '/', repeat=2, stdout=out)
+    assert 'includes/post_card.html' in out.getvalue()
+    assert '{% stylesheet %}' in out.getvalue()
@@ -0,0 +1,55 @@
+import importlib
+import sys
+from io import StringIO
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.template.backends.django import DjangoTemplates
+
+from blog.template_warmup import precompile_templates
+
+
+def test_precompile_fills_cached_loader(settings):
+    engine = DjangoTemplates({
+        'NAME': 'production',
+        'DIRS': [settings.TEMPLATES_DIR],
+        'APP_DIRS': False,
+        'OPTIONS': {'loaders': [('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ])]},
+    }).engine
+    report = precompile_templates(engine)
+    assert not report['failed']
+    assert 'includes/post_card.html' in report['parse_times']
+    assert 'blog/index.html' in report['saved']
+    assert 'includes/post_card.html' not in report['saved']
+    assert report['saved']['blog/index.html'] > (
+        report['parse_times']['blog/index.html']), (
+        'Убедитесь, что экономия для страницы учитывает базовый и '
+        'подключаемые шаблоны.'
+    )
+    cache = engine.template_loaders[0].get_template_cache
+    assert 'includes/comments.html' in cache
+
+
+def test_precompile_templates_command():
+    out = StringIO()
+    call_command('precompile_templates', stdout=out)
+    assert 'blog/detail.html' in out.getvalue()
+
+
+def import_production_settings():
+    sys.modules.pop('blogicum.settings_production', None)
+    return importlib.import_module('blogicum.settings_production')
+
+
+def test_production_settings_require_secret_key(monkeypatch):
+    monkeypatch.delenv('DJANGO_SECRET_KEY', raising=False)
+    with pytest.raises(ImproperlyConfigured):
+        import_production_settings()
+    monkeypatch.setenv('DJANGO_SECRET_KEY', 'production-secret')
+    production = import_production_settings()
+    assert production.SECRET_KEY == 'production-secret'
+    assert production.TEMPLATE_PRECOMPILE